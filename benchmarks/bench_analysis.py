@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import lyrics_corpus
+import lyrics_functions
+import lyrics_scrp
+import synthetic
+
+'''
+Times the analysis pipeline on synthetic data (benchmarks/synthetic.py) and saves the results as JSON, so two
+runs, e.g. before and after a change, can be compared.
+
+For every scale: lyrics_to_dict, tokenize_lyrics, then for every timeframe to_timeframe, every metric of
+lyrics_functions.METRICS on its own, and all of them in one compute_metrics call, also with --workers processes
+when given (the speedup needs that many CPUs, see meta['cpus']). Each step reports the best time of --repeats runs
+and, unless --no-memory, the peak memory allocated during one extra run traced by tracemalloc (numpy buffers
+included, in this process only).
+
+    python benchmarks/bench_analysis.py --scale 0.1 1 --out results.json
+    python benchmarks/bench_analysis.py --scale 0.1 --compare results.json      # flags steps slower than --threshold
+    python benchmarks/bench_analysis.py --scale 1 --timeframe week --workers 4  # serial against 4 processes
+'''
+
+TIMEFRAMES = ['week', 'month', 'year', 'decade']
+
+
+def measure(function, repeats, memory):
+    """
+    Best time of repeats calls of function() and its peak traced memory
+    :return: (seconds, peak bytes or None, result of the last call)
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:  # separate run, tracing slows the code down
+        del result
+        tracemalloc.start()
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def run(scales, timeframes, repeats, memory, seed, workers=None):
+    """
+    Run every step at every scale
+    :return: list of result dicts {'scale', 'step', 'timeframe', 'seconds', 'peak_bytes'}
+    """
+    lyrics_functions.result_cache = None  # time the computation, not the cache
+    warnings.filterwarnings('ignore', category=RuntimeWarning)  # means of the empty weeks of small scales
+    results = []
+
+    def record(scale, step, timeframe, function):
+        seconds, peak, result = measure(function, repeats, memory)
+        results.append({'scale': scale, 'step': step, 'timeframe': timeframe, 'seconds': seconds, 'peak_bytes': peak})
+        peak_text = f'{peak / 1024 ** 2:9.1f} MB' if peak is not None else ''
+        print(f'  {step:28s} {timeframe or "":7s} {seconds:9.3f} s {peak_text}', flush=True)
+        return result
+
+    for scale in scales:
+        start = time.perf_counter()
+        song_list, lyric_lists = synthetic.make_dataset(scale, seed)
+        print(f'scale {scale}: {len(song_list)} weeks, {sum(len(week) - 1 for week in song_list)} entries, '
+              f'{len(lyric_lists)} songs (generated in {time.perf_counter() - start:.1f} s)', flush=True)
+
+        lyric_dict = record(scale, 'lyrics_to_dict', None, lambda: lyrics_scrp.lyrics_to_dict(lyric_lists))[0]
+        corpus = record(scale, 'tokenize_lyrics', None, lambda: lyrics_corpus.tokenize_lyrics(lyric_dict))
+        for timeframe in timeframes:
+            binned = record(scale, 'to_timeframe', timeframe,
+                            lambda: lyrics_functions.to_timeframe(song_list, lyric_dict, timeframe, corpus=corpus))
+            for name in lyrics_functions.METRICS:
+                record(scale, name, timeframe, lambda: lyrics_functions.compute_metrics([name], binned=binned))
+            record(scale, 'compute_metrics (all)', timeframe,
+                   lambda: lyrics_functions.compute_metrics(list(lyrics_functions.METRICS), binned=binned))
+            if workers:
+                record(scale, f'compute_metrics ({workers} workers)', timeframe,
+                       lambda: lyrics_functions.compute_metrics(list(lyrics_functions.METRICS), binned=binned, workers=workers))
+                print(f'  {"speedup":28s} {timeframe:7s} {results[-2]["seconds"] / results[-1]["seconds"]:9.2f} x', flush=True)
+            del binned
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the time ratio of every step also present in baseline
+    :return: number of steps slower than threshold times the baseline
+    """
+    old = {(r['scale'], r['step'], r['timeframe']): r for r in baseline['results']}
+    slower = 0
+    print(f'\ncompared with {baseline["meta"]["date"]} (ratio new / old)')
+    for r in results:
+        key = (r['scale'], r['step'], r['timeframe'])
+        if key not in old:
+            continue
+        ratio = r['seconds'] / max(old[key]['seconds'], 1e-9)
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            slower += 1
+        print(f'  {r["scale"]:<6} {r["step"]:28s} {r["timeframe"] or "":7s} {ratio:6.2f}x{flag}')
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the analysis pipeline on synthetic data')
+    parser.add_argument('--scale', type=float, nargs='+', default=[0.1], help='sizes relative to the real corpus, e.g. 0.1 1 10 100')
+    parser.add_argument('--timeframe', nargs='+', default=TIMEFRAMES, choices=TIMEFRAMES)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help='also time compute_metrics (all) with this many processes')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run of every step')
+    parser.add_argument('--out', help='JSON file to save the results to')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25, help='ratio over which a step counts as slower')
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.timeframe, args.repeats, not args.no_memory, args.seed, args.workers)
+    meta = {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'seed': args.seed, 'repeats': args.repeats,
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else None}  # KB on Linux
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(results, json.load(f), args.threshold)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
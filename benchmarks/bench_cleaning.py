@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import lyrics_scrp
+import synthetic
+
+'''
+Checks lyrics_scrp.lyrics_to_dict against the original regex cleaning on the edge cases of
+benchmarks/fixtures/lyrics_cleaning.json and on synthetic lyrics, and times both.
+
+    python benchmarks/bench_cleaning.py --scale 1
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def regex_lyrics_to_dict(lyric_lists):
+    """
+    The original lyrics_to_dict: two findall and two nested greedy re.sub per song
+    :param lyric_lists: list of [title, artist, lyrics or None]
+    :return: (lyric_dict, non_lyrics)
+    """
+    lyric_dict = {}
+    non_lyrics = {}
+    for song in lyric_lists:
+        if all([isinstance(song_inf, str) for song_inf in song]):
+            paren = re.findall(r'\((.*?)\)', song[2])
+            bracket = re.findall(r'\[(.*?)\]', song[2])
+            parsed = re.sub(r'\[.*\]', '', re.sub(r'\(.*\)', '', song[2]))
+            lyric_dict[tuple(song[0:2])] = [song[0] + ', ' + song[1], parsed, paren, bracket]
+        else:
+            non_lyrics[tuple(song[0:2])] = song[2]
+    return lyric_dict, non_lyrics
+
+
+def best_time(function, repeats):
+    """
+    :return: (best seconds of repeats calls, result of the last call)
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check and time the lyric cleaning of lyrics_to_dict')
+    parser.add_argument('--scale', type=float, default=1.0, help='size of the synthetic data relative to the real corpus')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(FIXTURES, 'lyrics_cleaning.json'), encoding='utf-8') as f:
+        cases = json.load(f)
+    mismatches = 0
+    reference = regex_lyrics_to_dict(cases)
+    for key, value in lyrics_scrp.lyrics_to_dict(cases)[0].items():
+        if value != reference[0][key]:
+            mismatches += 1
+            print(f'  MISMATCH {key}: {value!r} != {reference[0][key]!r}')
+    for title, artist, lyrics in cases:  # greedy=False removes what re.sub('\\(.*?\\)', ...) would
+        if lyrics is not None:
+            expected = re.sub(r'\[.*?\]', '', re.sub(r'\(.*?\)', '', lyrics))
+            if lyrics_scrp.clean_lyrics(lyrics, greedy=False)[0] != expected:
+                mismatches += 1
+                print(f'  MISMATCH greedy=False {title}: {lyrics_scrp.clean_lyrics(lyrics, greedy=False)[0]!r} != {expected!r}')
+    print(f'fixtures: {len(cases)} songs, {"ok" if mismatches == 0 else f"{mismatches} MISMATCH"}')
+
+    song_list, lyric_lists = synthetic.make_dataset(args.scale)
+    print(f'synthetic scale {args.scale}: {len(lyric_lists)} songs, best of {args.repeats}')
+    base, reference = best_time(lambda: regex_lyrics_to_dict(lyric_lists), args.repeats)
+    print(f'  {"regex":22s} {base:7.3f} s')
+    elapsed, result = best_time(lambda: lyrics_scrp.lyrics_to_dict(lyric_lists), args.repeats)
+    check = 'ok' if result == reference else 'MISMATCH'
+    mismatches += check != 'ok'
+    print(f'  {"scan_lyrics":22s} {elapsed:7.3f} s {base / elapsed:5.1f}x {check}')
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
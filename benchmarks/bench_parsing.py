@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import html_parsing
+
+'''
+Times every installed html_parsing backend on the saved pages in benchmarks/fixtures and checks that they all
+extract the same text as the original BeautifulSoup 'html.parser' path.
+
+    python benchmarks/bench_parsing.py [repeats]
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PAGES = [('billboard_chart.html', html_parsing.parse_chart), ('genius_song.html', html_parsing.parse_lyrics)]
+
+
+def time_backend(parse, html, backend, repeats):
+    """
+    Best time of repeats runs of parse(html, backend)
+    :return: (seconds, parsed output)
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = parse(html, backend)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(repeats=20):
+    for fname, parse in PAGES:
+        with open(os.path.join(FIXTURES, fname), encoding='utf-8') as f:
+            html = f.read()
+        print(f'{fname} ({len(html) // 1024} KB), best of {repeats}')
+
+        base, reference = time_backend(parse, html, 'html.parser', repeats)
+        for backend in html_parsing.BACKENDS:
+            try:
+                elapsed, result = time_backend(parse, html, backend, repeats)
+            except ImportError as e:
+                print(f'  {backend:12s} skipped: {e}')
+                continue
+            check = 'ok' if result == reference else 'MISMATCH'
+            print(f'  {backend:12s} {elapsed * 1000:8.2f} ms {base / elapsed:5.1f}x {check}')
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
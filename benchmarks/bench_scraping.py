@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import billboard_scraping
+import html_parsing
+import lyrics_scrp
+
+'''
+Replays both scrapers against a local HTTP server that serves the saved pages of benchmarks/fixtures, to measure
+fetch and parse throughput offline and without rate limits:
+    billboard_scraping.main - the last --weeks chart weeks, every page is the fixture chart with the requested date
+    lyrics_scrp.scrape_songs - --songs songs through get_song (Genius search API), the song API and the lyrics page
+
+The server answers every request after --latency milliseconds, to see how the concurrency of the scrapers hides
+network latency. Parse-only times of the same pages are reported next to it, the rest is request handling.
+
+    python benchmarks/bench_scraping.py --weeks 100 --songs 200 --latency 20 --out scraping.json
+'''
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_DATE = 'August 9, 1969'  # date shown on the saved chart page
+DECOY_HITS = 3  # search hits of other artists listed before the right one
+
+
+def read_fixture(fname):
+    with open(os.path.join(FIXTURES, fname), encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureServer:
+    """
+    Local Billboard and Genius stand-in on a free port, in a background thread
+    :param songs: list of [Song name, Artist name] the search API knows
+    :param latency: seconds to wait before every response
+    """
+    def __init__(self, songs, latency=0.0):
+        self.chart = read_fixture('billboard_chart.html')
+        self.song_page = read_fixture('genius_song.html')
+        self.latency = latency
+        self.songs = songs
+        self.titles = {}  # searchable title -> song ids
+        for i, (title, artist) in enumerate(songs):
+            self.titles.setdefault(lyrics_scrp.modify_name(title), []).append(i)
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, content_type, body = server.respond(self.path)
+                body = body.encode('utf-8')
+                time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server.lock:
+                    server.requests += 1
+                    server.bytes += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def respond(self, path):
+        """
+        :param path: request path and query
+        :return: (status, content type, body)
+        """
+        parts = urlsplit(path)
+        if parts.path.startswith('/charts/hot-100/'):
+            date = datetime.datetime.strptime(parts.path.rsplit('/', 1)[1], '%Y-%m-%d').date()
+            return 200, 'text/html', self.chart.replace(FIXTURE_DATE, f'{date:%B} {date.day}, {date.year}')
+        if parts.path == '/search':
+            query = unquote(parts.query[len('q='):])
+            ids = self.titles.get(query, [])
+            hits = [{'result': {'primary_artist': {'name': 'Someone Else %d' % k}, 'api_path': '/songs/0'}}
+                    for k in range(DECOY_HITS)]
+            hits += [{'result': {'primary_artist': {'name': self.songs[i][1]}, 'api_path': '/songs/%d' % i}} for i in ids]
+            return 200, 'application/json', json.dumps({'response': {'hits': hits}})
+        match = re.fullmatch(r'/songs/(\d+)', parts.path)
+        if match:
+            return 200, 'application/json', json.dumps({'response': {'song': {'path': '/song-%s-lyrics' % match.group(1)}}})
+        if re.fullmatch(r'/song-\d+-lyrics', parts.path):
+            return 200, 'text/html', self.song_page
+        return 404, 'text/plain', 'not found'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def bench_billboard(server, weeks, concurrency):
+    """
+    Run billboard_scraping.main over the last weeks chart weeks in a temporary directory
+    :return: (seconds, number of weeks saved)
+    """
+    billboard_scraping.base_url = server.url + '/charts/hot-100/'
+    first_week = datetime.date.today() + datetime.timedelta(days=7) - datetime.timedelta(days=7 * weeks)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(directory)  # main writes Songs and Songs.jsonl to the working directory
+        try:
+            start = time.perf_counter()
+            asyncio.run(billboard_scraping.main(first_week=str(first_week), concurrency=concurrency))
+            elapsed = time.perf_counter() - start
+            saved = sum(1 for line in open('Songs.jsonl'))
+        finally:
+            os.chdir(cwd)
+    return elapsed, saved
+
+
+def bench_genius(server, songs, concurrency):
+    """
+    Run lyrics_scrp.scrape_songs over songs without rate limit or response cache
+    :return: (seconds, number of songs whose lyrics match the fixture)
+    """
+    lyrics_scrp.base_url = server.url
+    lyrics_scrp.page_base_url = server.url
+    lyrics_scrp.cache = None
+    expected = html_parsing.parse_lyrics(server.song_page, lyrics_scrp.html_backend)
+    start = time.perf_counter()
+    found = sum(lyrics == expected for Song, lyrics in lyrics_scrp.scrape_songs(songs, workers=concurrency, rate=1e9))
+    return time.perf_counter() - start, found
+
+
+def time_parse(parse, html, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        parse(html)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay the scrapers against local fixtures')
+    parser.add_argument('--weeks', type=int, default=100, help='chart weeks fetched by billboard_scraping.main')
+    parser.add_argument('--songs', type=int, default=200, help='songs scraped by lyrics_scrp.scrape_songs')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help='milliseconds before every response')
+    parser.add_argument('--out', help='JSON file to save the results to')
+    args = parser.parse_args(argv)
+
+    songs = [['Song %d' % i, 'Artist %d' % (i % 50)] for i in range(args.songs)]
+    results = []
+    with FixtureServer(songs, args.latency / 1000) as server:
+        for name, run, count, parse, page in [
+                ('billboard_scraping.main', lambda: bench_billboard(server, args.weeks, args.concurrency), args.weeks,
+                 html_parsing.parse_chart, server.chart),
+                ('lyrics_scrp.scrape_songs', lambda: bench_genius(server, songs, args.concurrency), args.songs,
+                 html_parsing.parse_lyrics, server.song_page)]:
+            requests, sent = server.requests, server.bytes
+            seconds, done = run()
+            parse_seconds = time_parse(parse, page, count)
+            result = {'step': name, 'items': count, 'done': done, 'seconds': seconds,
+                      'items_per_second': count / seconds, 'requests': server.requests - requests,
+                      'megabytes': (server.bytes - sent) / 1024 ** 2, 'parse_seconds': parse_seconds,
+                      'latency_ms': args.latency, 'concurrency': args.concurrency}
+            results.append(result)
+            print(f"{name:26s} {done}/{count} in {seconds:.2f} s, {result['items_per_second']:.1f}/s, "
+                  f"{result['requests']} requests, {result['megabytes'] / seconds:.1f} MB/s, parsing {parse_seconds:.2f} s")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'meta': {'date': time.strftime('%Y-%m-%d %H:%M:%S')}, 'results': results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import datetime
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import lyrics_scrp
+
+'''
+Synthetic data shaped like the scraped data, at a chosen scale of the real corpus:
+    song_list - list of weekly dictionaries like Songs ({'Week': 'YYYY-MM-DD', 1: [title, artist], ...})
+    lyric_lists - list of [title, artist, lyrics or None] like the scraped Lyrics, lyrics_scrp.lyrics_to_dict turns
+                  it into lyric_dict
+
+At scale 1 there are as many weeks, chart entries and unique songs as in the real data (about 3200 weeks of 100
+entries, 29000 songs). The weeks always cover the real dates, a larger scale makes the weekly charts and the number
+of songs proportionally larger, so every timeframe gets the same number of bins with bigger bins. Words follow a
+Zipf distribution over a vocabulary that grows with the square root of the scale, and songs repeat their chorus
+lines, so the word counts look like real lyrics.
+
+    song_list, lyric_lists = make_dataset(scale=0.1, seed=0)
+    lyric_dict, non_lyrics = lyrics_scrp.lyrics_to_dict(lyric_lists)
+'''
+
+FIRST_WEEK = datetime.date(1958, 8, 4)
+REAL_WEEKS = 3200
+REAL_SONGS = 29000
+MEAN_WEEKS_ON_CHART = 11  # with REAL_SONGS this gives charts of about 100 songs
+FOUND_RATE = 0.9  # share of songs with lyrics, the rest are None like failed scrapes
+WORDS_PER_SONG = 280
+VOCAB_SIZE = 40000
+ZIPF_EXPONENT = 1.1
+PUNCTUATION = np.array(['', '', '', ',', '!', '?', '.'])
+ADLIBS = np.array([' (oh)', ' (yeah)', ' (oh yeah)', ' (hey)', ' (ooh)'])
+LETTERS = np.array(list('etaoinshrdlcumwfgypbvkjxqz'))
+LETTER_WEIGHTS = np.array([12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4, 2.2, 2.0,
+                           2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1])
+
+
+def make_vocab(size, rng):
+    """
+    Distinct lowercase pseudo-words, shorter words first so the frequent (low rank) words are the short ones
+    :param size: number of words
+    :param rng: numpy Generator
+    :return: list of words
+    """
+    words = {}  # insertion ordered, so the vocabulary does not depend on string hashing
+    while len(words) < size:
+        lengths = np.clip(rng.poisson(4.5, size), 1, 14)
+        letters = rng.choice(LETTERS, size=int(lengths.sum()), p=LETTER_WEIGHTS / LETTER_WEIGHTS.sum())
+        for word in np.split(letters, np.cumsum(lengths)[:-1]):
+            words[''.join(word)] = None
+    return sorted(list(words)[:size], key=len)
+
+
+def make_lyrics(vocab, cdf, rng):
+    """
+    Lyrics of one song: verses, a repeated chorus under a [Chorus] header, some (parenthetical) ad-libs and punctuation
+    :param vocab: numpy array of words
+    :param cdf: cumulative probability of the words
+    :param rng: numpy Generator
+    :return: string of lyrics
+    """
+    num_words = max(20, int(rng.normal(WORDS_PER_SONG, WORDS_PER_SONG / 3)))
+    words = vocab[np.minimum(np.searchsorted(cdf, rng.random(num_words)), len(vocab) - 1)]
+    line_lengths = rng.integers(4, 11, size=num_words // 4 + 1)
+    lines = [' '.join(line) for line in np.split(words, np.cumsum(line_lengths)) if len(line)]
+    ends = PUNCTUATION[rng.integers(0, len(PUNCTUATION), len(lines))]
+    capitalize = rng.random(len(lines)) < 0.5
+    adlibs = np.where(rng.random(len(lines)) < 0.08, ADLIBS[rng.integers(0, len(ADLIBS), len(lines))], '')
+    lines = [(line.capitalize() if upper else line) + end + adlib
+             for line, end, upper, adlib in zip(lines, ends.tolist(), capitalize.tolist(), adlibs.tolist())]
+
+    chorus = lines[:4]
+    verses = [lines[start:start + 8] for start in range(4, len(lines), 8)]
+    song = []
+    for i, verse in enumerate(verses):
+        song += ['[Verse ' + str(i + 1) + ']'] + verse + ['', '[Chorus]'] + chorus + ['']
+    return '\n'.join(song if song else chorus)
+
+
+def make_dataset(scale=1.0, seed=0):
+    """
+    Synthetic song_list and lyric_lists at scale times the size of the real data
+    :param scale: size relative to the real corpus, e.g. 0.1, 1, 10, 100
+    :param seed: random seed, the same (scale, seed) always gives the same data
+    :return: (song_list, lyric_lists)
+    """
+    assert scale > 0
+    rng = np.random.default_rng(seed)
+    num_songs = max(1, int(round(REAL_SONGS * scale)))
+    vocab = np.array(make_vocab(max(100, int(VOCAB_SIZE * scale ** 0.5)), rng), dtype=object)
+    cdf = np.cumsum(1.0 / np.arange(1, len(vocab) + 1) ** ZIPF_EXPONENT)
+    cdf /= cdf[-1]
+
+    # artists with a long tail, a few of them with several credited names like the real charts
+    num_artists = max(1, num_songs // 4)
+    artists = ['Artist ' + str(i) for i in range(num_artists)]
+    for i in range(0, num_artists, 7):
+        artists[i] += str(rng.choice([' & Band ' + str(i), ' Featuring Singer ' + str(i), ' With Group ' + str(i)]))
+    song_artist = (num_artists * rng.random(num_songs) ** 2).astype(np.int64)  # low ids chart more often
+    titles = ['Song ' + str(i) + str(rng.choice(['', '', '', " Girl's", ' (Remix)', ' Love'])) for i in range(num_songs)]
+
+    lyric_lists = []
+    for i in range(num_songs):
+        lyrics = make_lyrics(vocab, cdf, rng) if rng.random() < FOUND_RATE else None
+        lyric_lists.append([titles[i], artists[song_artist[i]], lyrics])
+
+    # every song debuts in order and stays on the chart for a geometric number of weeks, ranked at random each week
+    debut = np.sort(rng.integers(0, REAL_WEEKS, num_songs))
+    stay = rng.geometric(1 / MEAN_WEEKS_ON_CHART, num_songs)
+    week_of_entry = np.repeat(debut, stay) + np.concatenate([np.arange(n) for n in stay])
+    song_of_entry = np.repeat(np.arange(num_songs), stay)
+    keep = week_of_entry < REAL_WEEKS
+    week_of_entry, song_of_entry = week_of_entry[keep], song_of_entry[keep]
+    order = np.lexsort((rng.random(len(week_of_entry)), week_of_entry))
+
+    song_list = [{'Week': str(FIRST_WEEK + datetime.timedelta(days=7 * w))} for w in range(REAL_WEEKS)]
+    for w, i in zip(week_of_entry[order].tolist(), song_of_entry[order].tolist()):
+        week = song_list[w]
+        week[len(week)] = [titles[i], artists[song_artist[i]]]
+    return song_list, lyric_lists
+
+
+def make_lyric_dict(scale=1.0, seed=0):
+    """
+    make_dataset with the lyrics already converted by lyrics_scrp.lyrics_to_dict
+    :return: (song_list, lyric_dict)
+    """
+    song_list, lyric_lists = make_dataset(scale, seed)
+    return song_list, lyrics_scrp.lyrics_to_dict(lyric_lists)[0]
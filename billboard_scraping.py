@@ -1,87 +1,196 @@
-import aiohttp
-import asyncio
-
-from bs4 import BeautifulSoup as soup
-import datetime
-import pickle
-
-#Fetch function (this is the one that can take a while, so I raise an error if it takes too long)
-async def fetch(session, url):
-    async with session.get(url) as response:
-        return await response.text()
-
-#Main loop
-async def main():
-	first_week = '1958-08-04'
-	date_obj = datetime.datetime.strptime(first_week, '%Y-%m-%d').date()
-
-	url = 'https://www.billboard.com/charts/hot-100/' + first_week
-	data = []
-
-	fname = 'Songs'
-
-	timeouts = 0
-	date_changes = 0
-
-	#timeout object
-	timeout = aiohttp.ClientTimeout(total = 10)
-
-	#While date is less than current top list
-	while date_obj < datetime.datetime.now().date() + datetime.timedelta(days=7):
-		print('Getting songs for ' + str(date_obj) + '...\n')
-
-		#Try to fetch the url and restart the connection if it times out (loop without changing date)
-		try:
-			async with aiohttp.ClientSession(timeout = timeout) as session:
-				html = await fetch(session, url)
-		except:
-			print('Timeout. Restarting connection...\n')
-			timeouts += 1
-			continue
-
-		# HTML parsing
-		page_soup = soup(html, "html.parser")
-
-		#Get songs, artists, and date
-		songs = page_soup.select('span[class=chart-list-item__title-text]')
-		artists = page_soup.select('div[class=chart-list-item__artist]')
-		date = page_soup.select('button[class=chart-detail-header__date-selector-button]')
-
-		date_str = date[0].get_text().strip()
-		date_on_page = datetime.datetime.strptime(date_str, '%B %d, %Y').date()
-
-		#Account for date mismatches
-		if date_obj != date_on_page:
-			date_obj = date_on_page
-			print('Date mismatch. Changing date to ' + str(date_obj) + '...\n')
-			date_changes += 1
-
-		#Append with song and artist names
-		week = {}
-		week['Week'] = str(date_obj)
-		for i in range(len(songs)):
-			week[i+1] = [songs[i].get_text().strip(), artists[i].get_text().strip()]
-
-		num_errors = 0
-
-		if bool(week):
-			print('Data gathered.\n')
-		else:
-			print('Data empty!\n')
-			num_errors += 1
-
-		#Save to file
-		data.append(week)
-		print('Data saved to file.\n')
-		with open(fname, 'wb') as f:
-			pickle.dump(data, f)
-
-		#Update date and url
-		date_obj += datetime.timedelta(days=7)
-		url = 'https://www.billboard.com/charts/hot-100/' + str(date_obj)
-
-	print(f'All done! {num_errors} errors, {timeouts} timeouts, and {date_changes} date mismatches encountered.\n')
-
-#Start process
-loop = asyncio.get_event_loop()
-loop.run_until_complete(main())
\ No newline at end of file
+import aiohttp
+import asyncio
+
+import datetime
+import pickle
+
+import checkpoint_log
+import html_parsing
+
+base_url = 'https://www.billboard.com/charts/hot-100/'
+
+#Statuses worth another attempt, any other error status (e.g. 404 for a date without a chart) will not change on retry
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+#Fetch function (this is the one that can take a while, so I raise an error if it takes too long)
+async def fetch(session, url):
+	async with session.get(url) as response:
+		response.raise_for_status()
+		return await response.text()
+
+#Timeouts, connection errors and the statuses of RETRY_STATUS can go away on their own, other error statuses cannot
+def is_transient(error):
+	if isinstance(error, aiohttp.ClientResponseError):
+		return error.status in RETRY_STATUS
+	return True
+
+#Fetch with a capped number of attempts and exponential backoff between them, only transient errors are retried
+async def fetch_with_retry(session, url, max_attempts = 5, backoff = 1.0):
+	for attempt in range(max_attempts):
+		try:
+			return await fetch(session, url)
+		except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+			if attempt == max_attempts - 1 or not is_transient(error):
+				raise
+			print('Retrying ' + url + '...\n')
+			retry_after = error.headers.get('Retry-After') if isinstance(error, aiohttp.ClientResponseError) and error.headers else None
+			await asyncio.sleep(float(retry_after) if retry_after and retry_after.isdigit() else backoff * 2 ** attempt)
+
+#Get the date and the [song, artist] pairs of a chart page, backend is one of html_parsing.BACKENDS
+def parse_week(html, backend = None):
+	#Get songs, artists, and date
+	date_str, songs, artists = html_parsing.parse_chart(html, backend)
+	date_on_page = datetime.datetime.strptime(date_str, '%B %d, %Y').date()
+
+	#Append with song and artist names
+	week = {}
+	week['Week'] = str(date_on_page)
+	for i in range(len(songs)):
+		week[i+1] = [songs[i], artists[i]]
+
+	return date_on_page, week
+
+#Weeks are logged as {'Week': date, 'Songs': [[song, artist], ...]} since JSON keys can only be strings
+def week_to_record(week):
+	return {'Week': week['Week'], 'Songs': [week[i] for i in range(1, len(week))]}
+
+def week_from_record(record):
+	week = {'Week': record['Week']}
+	for i, song in enumerate(record['Songs']):
+		week[i+1] = song
+	return week
+
+#Fetch and parse the chart of one week, at most `concurrency` of these run at the same time. The week is None if
+#every attempt failed (worth trying again later) and empty if the page answered with a final error status such as 404
+async def fetch_week(session, semaphore, date_obj, stats):
+	async with semaphore:
+		print('Getting songs for ' + str(date_obj) + '...\n')
+		try:
+			html = await fetch_with_retry(session, base_url + str(date_obj))
+		except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+			if not is_transient(error):
+				print('No chart for ' + str(date_obj) + ' (status ' + str(error.status) + '), not requesting it again.\n')
+				stats['errors'] += 1
+				return date_obj, None, {}
+			print('Giving up on ' + str(date_obj) + '.\n')
+			stats['failures'] += 1
+			return date_obj, None, None
+
+	date_on_page, week = parse_week(html)
+	return date_obj, date_on_page, week
+
+#Fetch a batch of weeks concurrently, results are keyed by the date on the page since they arrive out of order,
+#the dates that failed every attempt are returned too so they can be tried again later, and the dates with a final
+#error status so they are not
+async def fetch_weeks(session, semaphore, dates, stats):
+	results = await asyncio.gather(*[fetch_week(session, semaphore, date_obj, stats) for date_obj in dates])
+
+	weeks = {}
+	failed = set()
+	gone = set()
+	for date_obj, date_on_page, week in results:
+		if week is None:
+			failed.add(date_obj)
+			continue
+		if date_on_page is None:
+			gone.add(date_obj)
+			continue
+
+		#Account for date mismatches
+		if date_obj != date_on_page:
+			print('Date mismatch. ' + str(date_obj) + ' is the chart of ' + str(date_on_page) + '...\n')
+			stats['date_changes'] += 1
+
+		if not bool(week):
+			print('Data empty!\n')
+			stats['errors'] += 1
+
+		weeks[date_on_page] = week
+
+	return weeks, failed, gone
+
+#Main loop
+async def main(first_week = '1958-08-04', concurrency = 8, weeks_per_batch = 52, final_retries = 3):
+	date_obj = datetime.datetime.strptime(first_week, '%Y-%m-%d').date()
+	last_date = datetime.datetime.now().date() + datetime.timedelta(days=7)
+	one_week = datetime.timedelta(days=7)
+
+	fname = 'Songs'
+	log_fname = 'Songs.jsonl'
+	stats = {'errors': 0, 'failures': 0, 'date_changes': 0}
+
+	#Resume from the append-only log, every week in it was already fetched. Dates that failed every attempt are
+	#logged as {'Failed': date}, then {'Recovered': date} once fetched or {'Gone': date} if the page answers with a
+	#final error status, the ones still failed are tried again
+	data = []
+	pending = set()
+	for record in checkpoint_log.read_records(log_fname):
+		if 'Week' in record:
+			data.append(week_from_record(record))
+		elif 'Failed' in record:
+			pending.add(datetime.datetime.strptime(record['Failed'], '%Y-%m-%d').date())
+		else:
+			pending.discard(datetime.datetime.strptime(record.get('Recovered', record.get('Gone')), '%Y-%m-%d').date())
+	data.sort(key = lambda week: week['Week'])
+	saved = set(week['Week'] for week in data)
+	if data:
+		date_obj = max(date_obj, datetime.datetime.strptime(data[-1]['Week'], '%Y-%m-%d').date() + one_week)
+		print('Resuming after ' + data[-1]['Week'] + ', ' + str(len(pending)) + ' failed weeks to retry...\n')
+
+	#timeout object, one pooled session for every request
+	timeout = aiohttp.ClientTimeout(total = 10)
+	connector = aiohttp.TCPConnector(limit = concurrency)
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async with aiohttp.ClientSession(timeout = timeout, connector = connector) as session:
+		#While date is less than current top list, then a few more rounds for the weeks that still failed
+		while date_obj < last_date or (pending and final_retries > 0):
+			dates = [date_obj + k * one_week for k in range(weeks_per_batch) if date_obj + k * one_week < last_date]
+			if not dates:
+				final_retries -= 1
+			retried = sorted(pending)
+			weeks, failed, gone = await fetch_weeks(session, semaphore, retried + dates, stats)
+
+			#A change of chart day can make two requested dates land more than a week apart,
+			#request the week after every such gap until no new chart shows up (failed dates wait for the next batch)
+			previous = [datetime.datetime.strptime(data[-1]['Week'], '%Y-%m-%d').date()] if data else []
+			gaps = True
+			while gaps:
+				found = previous + sorted(day for day in weeks if not previous or day > previous[0])
+				missing = [a + one_week for a, b in zip(found, found[1:]) if b - a > one_week and a + one_week not in weeks and a + one_week not in failed | gone]
+				new, new_failed, new_gone = await fetch_weeks(session, semaphore, missing, stats) if missing else ({}, set(), set())
+				new = {day: week for day, week in new.items() if day not in weeks}
+				weeks.update(new)
+				failed |= new_failed
+				gone |= new_gone
+				gaps = bool(new)
+
+			#Keep the weeks in chart order, skipping any already saved
+			new_weeks = [weeks[day] for day in sorted(weeks) if str(day) not in saved]
+			saved.update(week['Week'] for week in new_weeks)
+			data = sorted(data + new_weeks, key = lambda week: week['Week'])
+
+			#Save to file, only the new weeks and the changes to the failed dates are written
+			records = [week_to_record(week) for week in new_weeks]
+			records += [{'Failed': str(day)} for day in sorted(failed - pending)]
+			records += [{'Recovered': str(day)} for day in sorted(pending - failed - gone)]
+			records += [{'Gone': str(day)} for day in sorted(pending & gone)]
+			checkpoint_log.append_records(log_fname, records)
+			pending = failed
+			print('Data saved to file.\n')
+
+			#Update date, continue from the last chart found like a sequential crawl would (always moving forward)
+			if dates:
+				date_obj = max([dates[-1]] + list(weeks)) + one_week
+
+	#Export the usual pickle once at the end
+	with open(fname, 'wb') as f:
+		pickle.dump(data, f)
+
+	print(f"All done! {stats['errors']} errors, {stats['failures']} failed attempts, {len(pending)} weeks still missing, and {stats['date_changes']} date mismatches encountered.\n")
+	if pending:
+		print('Missing weeks: ' + ', '.join(str(day) for day in sorted(pending)) + ', run again to retry them.\n')
+
+#Start process
+if __name__ == "__main__":
+	asyncio.run(main())
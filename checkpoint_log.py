@@ -0,0 +1,53 @@
+import json
+import os
+
+'''
+Append-only JSON Lines checkpoints for the scraping scripts.
+Every record is written once, as one line, and flushed to disk before the call returns. A crash can at worst
+leave a partial last line, which read_records drops (and cuts from the file) so the run can resume from there.
+A damaged line elsewhere is skipped, it never costs the records after it.
+'''
+
+
+def append_records(fname, records):
+    """
+    Append records to a JSON Lines log and flush them to disk
+    :param fname: log file name
+    :param records: list of JSON serializable records
+    """
+    if not records:
+        return
+    lines = ''.join([json.dumps(record, ensure_ascii=False) + '\n' for record in records])
+    with open(fname, 'a', encoding='utf-8') as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_records(fname):
+    """
+    Read every complete record of a JSON Lines log. Only a torn last line (no newline) left by a crash is removed
+    from the file, a complete line that does not decode is skipped with a warning and the records after it are kept
+    :param fname: log file name
+    :return: list of records, empty if the file does not exist
+    """
+    if not os.path.exists(fname):
+        return []
+
+    records = []
+    good = 0  # byte offset of the end of the last complete line
+    with open(fname, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            if not line.endswith(b'\n'):
+                break  # only the last line can lack its newline
+            good += len(line)
+            try:
+                records.append(json.loads(line.decode('utf-8')))
+            except ValueError:
+                print(f'Skipping the undecodable line {number} of {fname}')
+
+    if good != os.path.getsize(fname):
+        print(f'Dropping a partial record at the end of {fname}')
+        with open(fname, 'r+b') as f:
+            f.truncate(good)
+    return records
@@ -0,0 +1,177 @@
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+'''
+Pluggable HTML parsing for the two pages the scrapers read:
+    parse_chart(html) - Billboard Hot 100 page -> (date string, song titles, artist names)
+    parse_lyrics(html) - Genius song page -> lyrics text
+
+Backends:
+    'stream' - targeted extractor on the standard library HTMLParser, it only keeps the text of the elements it
+               needs and stops reading the page once they are complete (default, no extra dependency)
+    'html.parser' - BeautifulSoup with the pure-Python parser, the original behaviour
+    'lxml' - BeautifulSoup with the lxml parser, needs lxml
+    'selectolax' - selectolax's Lexbor parser, needs selectolax
+
+benchmarks/bench_parsing.py times every installed backend on saved pages.
+'''
+
+BACKENDS = ['stream', 'html.parser', 'lxml', 'selectolax']
+DEFAULT_BACKEND = 'stream'
+
+CHART_TITLE = ('span', 'chart-list-item__title-text')
+CHART_ARTIST = ('div', 'chart-list-item__artist')
+CHART_DATE = ('button', 'chart-detail-header__date-selector-button')
+CHART_SIZE = 100
+
+CHUNK_SIZE = 16 * 1024  # characters fed to the streaming parser between two checks for completion
+
+
+class _TargetExtractor(HTMLParser):
+    """
+    Collects the text of elements matched by (tag, class), either on the whole class attribute like the
+    BeautifulSoup selector tag[class=name], or on any one of its classes like find(tag, class_=name).
+    Text inside script and style tags is skipped, like a get_text() after removing them.
+    :param targets: dict name -> (tag, class, exact), exact=True compares the whole class attribute
+    """
+    def __init__(self, targets):
+        super().__init__(convert_charrefs=True)
+        self.targets = targets
+        self.found = {name: [] for name in targets}
+        self.open = []  # [name, tag, depth of nested same tags, text parts] of the elements being read
+        self.closed = {name: 0 for name in targets}
+        self.skip = 0
+        self.data = []  # text since the last tag or comment
+
+    def flush(self):
+        """
+        Hand the text since the last tag or comment to the open elements. Like BeautifulSoup, a run of only
+        whitespace becomes a single newline (or space if it has no newline).
+        """
+        data = ''.join(self.data)
+        self.data = []
+        if not data or self.skip:
+            return
+        if not data.strip(' \n\t\x0c\r'):
+            data = '\n' if '\n' in data else ' '
+        for element in self.open:
+            element[3].append(data)
+
+    def handle_comment(self, data):
+        self.flush()
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag in ('script', 'style'):
+            self.skip += 1
+            return
+        for element in self.open:
+            if element[1] == tag:
+                element[2] += 1
+        classes = dict(attrs).get('class')
+        if classes is None:
+            return
+        for name, (target_tag, target_class, exact) in self.targets.items():
+            if tag == target_tag and (classes == target_class if exact else target_class in classes.split()):
+                self.open.append([name, tag, 0, []])
+
+    def handle_endtag(self, tag):
+        self.flush()
+        if tag in ('script', 'style'):
+            self.skip = max(0, self.skip - 1)
+            return
+        for element in list(self.open):
+            if element[1] != tag:
+                continue
+            if element[2] > 0:
+                element[2] -= 1
+            else:
+                self.open.remove(element)
+                self.found[element[0]].append(''.join(element[3]))
+                self.closed[element[0]] += 1
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+
+def _stream(html, targets, done):
+    """
+    Feed html to a _TargetExtractor chunk by chunk until done(extractor) is true
+    """
+    extractor = _TargetExtractor(targets)
+    for start in range(0, len(html), CHUNK_SIZE):
+        extractor.feed(html[start:start + CHUNK_SIZE])
+        if done(extractor):
+            return extractor.found
+    extractor.close()
+    extractor.flush()
+    return extractor.found
+
+
+def _soup(html, backend):
+    if backend == 'lxml':
+        return BeautifulSoup(html, 'lxml')
+    return BeautifulSoup(html, 'html.parser')
+
+
+def _selectolax(html):
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        raise ImportError("the 'selectolax' backend needs the selectolax package (pip install selectolax)")
+    return LexborHTMLParser(html)
+
+
+def parse_chart(html, backend=None):
+    """
+    Extract the chart date, song titles and artist names from a Billboard Hot 100 page
+    :param html: page source
+    :param backend: one of BACKENDS, DEFAULT_BACKEND if None
+    :return: (date string as on the page, list of titles, list of artists), all stripped
+    """
+    backend = backend or DEFAULT_BACKEND
+    assert backend in BACKENDS, f'unknown backend {backend}, choose from {BACKENDS}'
+
+    if backend == 'stream':
+        targets = {'title': CHART_TITLE + (True,), 'artist': CHART_ARTIST + (True,), 'date': CHART_DATE + (True,)}
+        found = _stream(html, targets, lambda extractor: extractor.closed['date'] > 0 and
+                        extractor.closed['title'] >= CHART_SIZE and extractor.closed['artist'] >= CHART_SIZE)
+        titles, artists, dates = found['title'], found['artist'], found['date']
+    elif backend == 'selectolax':
+        tree = _selectolax(html)
+        select = lambda target: [node.text() for node in tree.css('%s[class="%s"]' % target)]
+        titles, artists, dates = select(CHART_TITLE), select(CHART_ARTIST), select(CHART_DATE)
+    else:
+        page_soup = _soup(html, backend)
+        select = lambda target: [tag.get_text() for tag in page_soup.select('%s[class=%s]' % target)]
+        titles, artists, dates = select(CHART_TITLE), select(CHART_ARTIST), select(CHART_DATE)
+
+    return dates[0].strip(), [title.strip() for title in titles], [artist.strip() for artist in artists]
+
+
+def parse_lyrics(html, backend=None):
+    """
+    Extract the lyrics from a Genius song page (text of div.lyrics without its script tags)
+    :param html: page source
+    :param backend: one of BACKENDS, DEFAULT_BACKEND if None
+    :return: string of lyrics, None if the page has no lyrics div
+    """
+    backend = backend or DEFAULT_BACKEND
+    assert backend in BACKENDS, f'unknown backend {backend}, choose from {BACKENDS}'
+
+    if backend == 'stream':
+        found = _stream(html, {'lyrics': ('div', 'lyrics', False)}, lambda extractor: extractor.closed['lyrics'] > 0)
+        return found['lyrics'][0] if found['lyrics'] else None
+
+    if backend == 'selectolax':
+        tree = _selectolax(html)
+        tree.strip_tags(['script'])
+        node = tree.css_first('div.lyrics')
+        return node.text() if node is not None else None
+
+    page_soup = _soup(html, backend)
+    #remove script tags that they put in the middle of the lyrics
+    [h.extract() for h in page_soup('script')]
+    div = page_soup.find("div", class_="lyrics")
+    return div.get_text() if div is not None else None
@@ -0,0 +1,174 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+'''
+Persistent cache of HTTP response bodies, used by lyrics_scrp.py so that re-runs and repeated search variants are
+served locally instead of going back to Genius.
+
+Entries are addressed by the sha256 of the request url, expire after ttl seconds, and the least recently used
+entries are evicted once the total size of the bodies goes over max_bytes. Both backends have the same get/set
+interface and are safe to share between threads:
+    SQLiteCache(fname) - on disk, survives between runs
+    MemoryCache() - in memory, for tests
+'''
+
+
+def url_key(url):
+    """
+    Cache key of a url
+    :param url: request url
+    :return: hex sha256 of the url
+    """
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class MemoryCache:
+    """
+    In-memory response cache with ttl and least recently used eviction
+    :param ttl: seconds an entry stays valid, None to never expire
+    :param max_bytes: total size of the cached bodies before evicting, None for no limit
+    """
+    def __init__(self, ttl=30 * 24 * 3600, max_bytes=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (stored time, body), least recently used first
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        """
+        :param url: request url
+        :return: cached body, None if missing or expired
+        """
+        key = url_key(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[0] > self.ttl:
+                self._delete(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, url, body):
+        """
+        :param url: request url
+        :param body: response body (str)
+        """
+        key = url_key(url)
+        with self.lock:
+            if key in self.entries:
+                self._delete(key)
+            self.entries[key] = (time.time(), body)
+            self.size += len(body)
+            while self.max_bytes is not None and self.size > self.max_bytes and self.entries:
+                self._delete(next(iter(self.entries)))
+
+    def _delete(self, key):
+        self.size -= len(self.entries.pop(key)[1])
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteCache:
+    """
+    On-disk response cache in a SQLite file, with ttl and least recently used eviction
+    :param fname: SQLite file name, created if missing
+    :param ttl: seconds an entry stays valid, None to never expire
+    :param max_bytes: total size of the cached bodies before evicting, None for no limit
+    """
+    def __init__(self, fname='Genius_Cache.sqlite', ttl=30 * 24 * 3600, max_bytes=2 * 1024 ** 3):
+        self.fname = fname
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(fname, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        with self.db:  # one transaction, so no entry written by another process is missed by the running total
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute('CREATE TABLE IF NOT EXISTS responses '
+                            '(key TEXT PRIMARY KEY, url TEXT, body TEXT, size INTEGER, stored REAL, used REAL)')
+            # eviction only reads this index (rowid included), never the rows and their bodies
+            self.db.execute('DROP INDEX IF EXISTS responses_used')
+            self.db.execute('CREATE INDEX IF NOT EXISTS responses_used_size ON responses (used, size)')
+            # running total of the body sizes, kept by the file's own triggers for every connection
+            self.db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)')
+            self.db.execute("INSERT OR IGNORE INTO meta SELECT 'total_size', COALESCE(SUM(size), 0) FROM responses")
+            self.db.execute("CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses BEGIN "
+                            "UPDATE meta SET value = value + new.size WHERE name = 'total_size'; END")
+            self.db.execute("CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses BEGIN "
+                            "UPDATE meta SET value = value - old.size WHERE name = 'total_size'; END")
+        self.purge_expired()
+
+    def get(self, url):
+        """
+        :param url: request url
+        :return: cached body, None if missing or expired
+        """
+        key = url_key(url)
+        with self.lock:
+            row = self.db.execute('SELECT body, stored FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and time.time() - row[1] > self.ttl:
+                self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                return None
+            self.db.execute('UPDATE responses SET used = ? WHERE key = ?', (time.time(), key))
+            return row[0]
+
+    def set(self, url, body):
+        """
+        :param url: request url
+        :param body: response body (str)
+        """
+        now = time.time()
+        key = url_key(url)
+        with self.lock:
+            with self.db:  # delete then insert rather than INSERT OR REPLACE, which does not fire the delete trigger
+                self.db.execute('BEGIN IMMEDIATE')
+                self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.db.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)', (key, url, body, len(body), now, now))
+            if self.max_bytes is not None:
+                self._evict()
+
+    def purge_expired(self):
+        """
+        Delete every expired entry
+        """
+        if self.ttl is not None:
+            with self.lock:
+                self.db.execute('DELETE FROM responses WHERE stored < ?', (time.time() - self.ttl,))
+
+    def total_size(self):
+        """
+        :return: total size of the cached bodies, read from the running total
+        """
+        return self.db.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def _evict(self):
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        # drop least recently used entries until the total fits again, read from the (used, size) index only
+        freed = 0
+        rows = []
+        for rowid, size in self.db.execute('SELECT rowid, size FROM responses ORDER BY used'):
+            if total - freed <= self.max_bytes:
+                break
+            rows.append((rowid,))
+            freed += size
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.executemany('DELETE FROM responses WHERE rowid = ?', rows)
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import pickle
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+import http_cache
+import lyrics_store
+
+'''
+Memoization of the analytic functions of lyrics_functions.py, enabled with
+    lyrics_functions.result_cache = lyrics_cache.ResultCache()                          # in memory
+    lyrics_functions.result_cache = lyrics_cache.ResultCache(fname='Metric_Cache.sqlite') # and on disk, across sessions
+
+Results are stored per metric, keyed by a content hash of the input data (song list and lyric dict, entries and
+corpus, or the bins and their corpus), the timeframe, the metric name and its parameters. Any change to the data gives
+another hash, so stale results are never returned, they just age out of the least recently used eviction. The
+in-memory and on-disk layers are the http_cache backends, storing pickled results.
+'''
+
+CACHE_VERSION = 1 #part of every key, bump it when a metric changes so older cached results are not used
+CORPUS_KEYS = ['tokens','offsets','word_len','vocab','keys','lyrics','parens','bracketed']
+
+def _is_corpus(obj):
+    return isinstance(obj,dict) and 'tokens' in obj and 'keys' in obj
+
+def _update(h,obj):
+    '''
+    Feeds the content of obj to the hash h, arrays and tables by their buffers, anything else through pickle.
+    '''
+    if isinstance(obj,np.ndarray):
+        h.update(f'{obj.dtype.str}{obj.shape}'.encode())
+        h.update(np.ascontiguousarray(obj).data)
+    elif isinstance(obj,pd.DataFrame):
+        h.update(pickle.dumps((list(obj.columns),list(obj.dtypes.astype(str)))))
+        h.update(pd.util.hash_pandas_object(obj,index=True).values.data)
+    elif isinstance(obj,lyrics_store.StringTable):
+        _update(h,np.asarray(obj.data))
+        _update(h,np.asarray(obj.offsets))
+    elif isinstance(obj,lyrics_store.StringLists):
+        _update(h,obj.strings)
+        _update(h,np.asarray(obj.groups))
+    elif _is_corpus(obj): #derived lookups and caches are skipped
+        h.update(corpus_fingerprint(obj).encode())
+    else:
+        h.update(pickle.dumps(obj,protocol=4))
+
+def fingerprint(*objects):
+    '''
+    Content hash of the inputs of an analytic function.
+
+    Input:
+        objects - song lists, lyric dicts, entries tables, corpora, numpy arrays, or any picklable value
+    Output:
+        hex string, equal for equal contents
+    '''
+    h = hashlib.blake2b(digest_size=20)
+    for obj in objects:
+        _update(h,obj)
+    return h.hexdigest()
+
+def corpus_fingerprint(corpus):
+    '''
+    Content hash of a corpus, computed once and stored in it as corpus['fingerprint'] = (number of songs, hash). A
+    corpus only changes by getting new songs (lyrics_corpus.extend_corpus), which computes it again.
+    '''
+    cached = corpus.get('fingerprint')
+    if cached is None or cached[0] != len(corpus['keys']):
+        h = hashlib.blake2b(digest_size=20)
+        for name in CORPUS_KEYS:
+            _update(h,corpus[name])
+        corpus['fingerprint'] = (len(corpus['keys']), h.hexdigest())
+    return corpus['fingerprint'][1]
+
+def binned_fingerprint(binned,columns):
+    '''
+    Content hash of the bins of to_timeframe output used as columns. A bin is derived from its corpus and song ids,
+    so only those are hashed, the song ids of every bin in a single buffer.
+    '''
+    corpus = next(iter(binned.values()))['corpus'] if binned else None
+    h = hashlib.blake2b(digest_size=20)
+    h.update(fingerprint(corpus).encode())
+    bin_ids = [np.asarray(binned[tf]['song_ids'],dtype=np.int64) for tf in columns]
+    _update(h,list(columns))
+    _update(h,np.array([len(ids) for ids in bin_ids],dtype=np.int64))
+    _update(h,np.concatenate(bin_ids) if bin_ids else np.zeros(0,dtype=np.int64))
+    return h.hexdigest()
+
+def result_key(dataset,timeframe,name,params):
+    '''
+    Cache key of one metric on one dataset.
+    '''
+    return json.dumps([CACHE_VERSION,dataset,timeframe,name,params],sort_keys=True,default=str)
+
+class ResultCache:
+    '''
+    Least recently used cache of metric results, in memory and optionally on disk, plus the last few binned
+    datasets so raw_data calls with the same data only bin once.
+    :param max_bytes: size of the pickled results kept in memory
+    :param fname: SQLite file to also keep results on disk across sessions, None for memory only
+    :param disk_max_bytes: size of the results kept on disk
+    :param max_bins: number of binned datasets kept in memory
+    '''
+    def __init__(self,max_bytes=256 * 1024 ** 2,fname=None,disk_max_bytes=2 * 1024 ** 3,max_bins=2):
+        self.memory = http_cache.MemoryCache(ttl=None,max_bytes=max_bytes)
+        self.disk = http_cache.SQLiteCache(fname,ttl=None,max_bytes=disk_max_bytes) if fname else None
+        self.bins = OrderedDict()
+        self.max_bins = max_bins
+        self.hits = 0
+        self.misses = 0
+
+    def get(self,key):
+        '''
+        :return: cached result, None if missing
+        '''
+        body = self.memory.get(key)
+        if body is None and self.disk is not None:
+            body = self.disk.get(key)
+            if body is not None:
+                self.memory.set(key,body)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(body)
+
+    def set(self,key,value):
+        body = pickle.dumps(value,protocol=4)
+        self.memory.set(key,body)
+        if self.disk is not None:
+            self.disk.set(key,body)
+
+    def get_bins(self,key):
+        '''
+        :return: binned dataset stored with set_bins, None if missing
+        '''
+        if key not in self.bins:
+            return None
+        self.bins.move_to_end(key)
+        return self.bins[key]
+
+    def set_bins(self,key,binned):
+        self.bins[key] = binned
+        while len(self.bins) > self.max_bins:
+            self.bins.popitem(last=False)
+
+    def clear(self):
+        '''
+        Empties the in-memory layers, the on-disk results are kept.
+        '''
+        self.memory = http_cache.MemoryCache(ttl=None,max_bytes=self.memory.max_bytes)
+        self.bins.clear()
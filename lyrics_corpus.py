@@ -0,0 +1,480 @@
+import pickle
+import string
+import numpy as np
+import pandas as pd
+
+'''
+Compact corpus structures built once from the scraped data.
+Workflow follows as:
+    lyrics_scrp.py -> lyrics_to_dict() -> tokenize_lyrics() -> corpus used by lyrics_functions.py
+
+A corpus is a plain dictionary, every song in lyric_dict is given an integer song id (its position in
+corpus['keys']) and every distinct word an integer word id (its position in corpus['vocab']). The words of all
+songs are stored back to back in a single int32 array, song i owns tokens[offsets[i]:offsets[i+1]].
+'''
+
+translator = str.maketrans('','',string.punctuation) #remove punctuation
+punct_slots = np.full(256,-1,dtype=np.int64) #byte -> position of the character in string.punctuation, -1 if not punctuation
+punct_slots[[ord(char) for char in string.punctuation]] = np.arange(len(string.punctuation))
+trans_newline = str.maketrans('\n',' ') #replace newline with space
+
+def split_words(lyrics):
+    '''
+    Splits a lyric string into lowercase words with punctuation removed, same rules as the original to_timeframe.
+
+    Input:
+        lyrics - str of lyrics
+    Output:
+        list of str words
+    '''
+    return lyrics.translate(translator).translate(trans_newline).lower().split()
+
+def tokenize_lyrics(lyric_dict):
+    '''
+    Tokenizes every song of lyric_dict exactly once into a shared vocabulary of integer word ids.
+
+    Input:
+        lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
+            str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+    Output:
+        corpus - dictionary with the keys
+            'keys' - list of lyric_dict keys, the position of a key is its song id
+            'song_ids' - dict mapping lyric_dict key -> song id
+            'lyrics', 'parens', 'bracketed' - lists indexed by song id, references into lyric_dict (no copies)
+            'vocab' - list of words, the position of a word is its word id
+            'word_ids' - dict mapping word -> word id
+            'word_len' - np.int32 array, length of every vocab word
+            'tokens' - np.int32 array, word ids of every song back to back
+            'offsets' - np.int64 array of len(keys)+1, song i owns tokens[offsets[i]:offsets[i+1]]
+            'num_unique' - np.int32 array, number of unique words of every song
+            'song_vocab' - np.int32 array, sorted unique word ids of every song back to back
+            'vocab_offsets' - np.int64 array of len(keys)+1, song i's vocabulary is song_vocab[vocab_offsets[i]:vocab_offsets[i+1]]
+            'artists' - list of artist names, the position of a name is its artist id
+            'song_artist' - np.int32 array, artist id of every song
+    '''
+    assert isinstance(lyric_dict,dict)
+    assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(lyric_dict.values(),lyric_dict.keys())])
+
+    corpus = {}
+    corpus['keys'] = []
+    corpus['song_ids'] = {}
+    corpus['lyrics'] = []
+    corpus['parens'] = []
+    corpus['bracketed'] = []
+    corpus['vocab'] = []
+    corpus['word_ids'] = {}
+    corpus['word_len'] = np.zeros(0,dtype=np.int32)
+    corpus['tokens'] = np.zeros(0,dtype=np.int32)
+    corpus['offsets'] = np.zeros(1,dtype=np.int64)
+    corpus['song_vocab'] = np.zeros(0,dtype=np.int32)
+    corpus['vocab_offsets'] = np.zeros(1,dtype=np.int64)
+    corpus['num_unique'] = np.zeros(0,dtype=np.int32)
+    corpus['song_artist'] = np.zeros(0,dtype=np.int32)
+    corpus['artists'] = []
+    extend_corpus(corpus,lyric_dict)
+    return corpus
+
+def extend_corpus(corpus,lyric_dict):
+    '''
+    Adds the songs of lyric_dict that are not in the corpus yet, in place. Existing song ids and word ids do not
+    change, new songs and words get the next ids, so everything computed from the old corpus stays valid. Only the
+    new songs are tokenized and copied, the arrays grow into spare capacity (corpus['buffers']) and the artist ids
+    are kept in corpus['artist_ids'].
+
+    Input:
+        corpus - output of tokenize_lyrics (or lyrics_store.load_corpus, which is then read into memory)
+        lyric_dict - dictionary of songs, same format as tokenize_lyrics, songs already in the corpus are skipped
+    Output:
+        np.int64 array of the song ids that were added
+    '''
+    assert isinstance(corpus,dict)
+    assert isinstance(lyric_dict,dict)
+    assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(lyric_dict.values(),lyric_dict.keys())])
+
+    keys = [key for key in lyric_dict.keys() if key not in corpus['song_ids']]
+    first = len(corpus['keys'])
+    for name in ['keys','lyrics','parens','bracketed','vocab','artists']:
+        if not isinstance(corpus[name],list): #string tables of a store are read-only
+            corpus[name] = list(corpus[name])
+    corpus.pop('store',None) #no longer the same as the files
+
+    word_ids = corpus['word_ids']
+    vocab = corpus['vocab']
+    num_words = len(vocab)
+    song_tokens = []
+    song_vocab = []
+    offsets = np.zeros(len(keys)+1,dtype=np.int64)
+
+    for i, key in enumerate(keys):
+        ids = []
+        for word in split_words(lyric_dict[key][1]):
+            word_id = word_ids.get(word)
+            if word_id is None: #first time the word is seen, intern it
+                word_id = len(vocab)
+                word_ids[word] = word_id
+                vocab.append(word)
+            ids.append(word_id)
+        song_tokens.append(np.array(ids,dtype=np.int32))
+        song_vocab.append(np.unique(song_tokens[-1]))
+        offsets[i+1] = offsets[i] + len(ids)
+
+    for i, key in enumerate(keys):
+        corpus['song_ids'][key] = first + i
+    corpus['keys'].extend(keys)
+    corpus['lyrics'].extend([lyric_dict[key][1] for key in keys])
+    corpus['parens'].extend([lyric_dict[key][2] for key in keys])
+    corpus['bracketed'].extend([lyric_dict[key][3] for key in keys])
+    _append(corpus,'word_len',np.array([len(word) for word in vocab[num_words:]],dtype=np.int32))
+    _append(corpus,'tokens',np.concatenate([np.zeros(0,dtype=np.int32)] + song_tokens))
+    _append(corpus,'offsets',corpus['offsets'][-1] + offsets[1:])
+    _append(corpus,'song_vocab',np.concatenate([np.zeros(0,dtype=np.int32)] + song_vocab))
+    vocab_lens = np.array([len(vocab_ids) for vocab_ids in song_vocab],dtype=np.int64)
+    _append(corpus,'vocab_offsets',corpus['vocab_offsets'][-1] + np.cumsum(vocab_lens))
+    _append(corpus,'num_unique',vocab_lens.astype(np.int32))
+
+    artist_ids = corpus.get('artist_ids')
+    if artist_ids is None or len(artist_ids) != len(corpus['artists']): #first extension, or a corpus from a store
+        artist_ids = {artist: i for i, artist in enumerate(corpus['artists'])}
+        corpus['artist_ids'] = artist_ids
+    for key in keys:
+        if key[1] not in artist_ids:
+            artist_ids[key[1]] = len(artist_ids)
+            corpus['artists'].append(key[1])
+    _append(corpus,'song_artist',np.array([artist_ids[key[1]] for key in keys],dtype=np.int32))
+
+    return np.arange(first,first+len(keys),dtype=np.int64)
+
+def _append(corpus,name,values):
+    '''
+    Appends values to the array corpus[name] in place of np.concatenate, which copies the whole array on every
+    extension. The array is the start of a larger buffer (corpus['buffers'][name], with the length in use) whose
+    capacity doubles when it is full, so appending a week of songs only copies the new values. Views taken before
+    stay valid, appending never writes inside them.
+    '''
+    array = corpus[name]
+    buffer, used = corpus.setdefault('buffers',{}).get(name,(None,0))
+    size = len(array) + len(values)
+    if buffer is None or array.base is not buffer or len(array) != used or size > len(buffer): #not the end of the buffer in use
+        buffer = np.empty(max(size,2*len(array)),dtype=array.dtype)
+        buffer[:len(array)] = array
+    buffer[len(array):size] = values
+    corpus['buffers'][name] = (buffer,size)
+    corpus[name] = buffer[:size]
+
+def song_tokens(corpus,song_id):
+    '''
+    Returns the int32 word ids of a single song, a view into corpus['tokens'] (no copy).
+    '''
+    return corpus['tokens'][corpus['offsets'][song_id]:corpus['offsets'][song_id+1]]
+
+def song_vocab(corpus,song_id):
+    '''
+    Returns the sorted int32 ids of the distinct words of a single song, a view into corpus['song_vocab'] (no copy).
+    '''
+    return corpus['song_vocab'][corpus['vocab_offsets'][song_id]:corpus['vocab_offsets'][song_id+1]]
+
+def _gather(flat,offsets,song_ids):
+    '''
+    Concatenates the slices flat[offsets[i]:offsets[i+1]] of several songs (repeats allowed) without a Python loop.
+    '''
+    song_ids = np.asarray(song_ids,dtype=np.int64)
+    starts = offsets[song_ids]
+    lens = offsets[song_ids+1] - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.zeros(0,dtype=flat.dtype)
+
+    #position inside the output where every song begins, then shift a running index by the song start
+    out_starts = np.cumsum(lens) - lens
+    index = np.arange(total,dtype=np.int64) + np.repeat(starts - out_starts,lens)
+    return flat[index]
+
+def gather_tokens(corpus,song_ids):
+    '''
+    Concatenates the word ids of several songs (repeats allowed) into one int32 array.
+
+    Input:
+        corpus - output of tokenize_lyrics
+        song_ids - array-like of song ids
+    Output:
+        np.int32 array of word ids in the order of song_ids
+    '''
+    return _gather(corpus['tokens'],corpus['offsets'],song_ids)
+
+def vocabulary(corpus,song_ids):
+    '''
+    Exact set of distinct words used by several songs, as a sorted int32 array of word ids.
+    Only the per-song vocabularies are merged (each song once, however many times it charted), no word lists are built.
+    Two results merge with np.union1d.
+
+    Input:
+        corpus - output of tokenize_lyrics
+        song_ids - array-like of song ids, repeats allowed
+    Output:
+        sorted np.int32 array of unique word ids
+    '''
+    return np.unique(_gather(corpus['song_vocab'],corpus['vocab_offsets'],np.unique(song_ids)))
+
+def song_word_counts(corpus):
+    '''
+    Number of occurrences and first position of every distinct word of every song, aligned with corpus['song_vocab']
+    (song i owns vocab_counts[vocab_offsets[i]:vocab_offsets[i+1]]). Computed once with a single np.unique over the
+    (song, word) pairs of the token array and cached in corpus['vocab_counts'] and corpus['vocab_first'], songs added
+    since by extend_corpus are counted on the next call.
+
+    Output:
+        vocab_counts - np.int32 array, occurrences of the word in the song
+        vocab_first - np.int32 array, position of the first occurrence of the word in the song's tokens
+    '''
+    known = len(corpus.get('vocab_counts',()))
+    if 'vocab_counts' not in corpus or known != len(corpus['song_vocab']):
+        first_song = int(np.searchsorted(corpus['vocab_offsets'],known)) #songs before it are already counted
+        song_ids = np.arange(first_song,len(corpus['keys']),dtype=np.int64)
+        num_words = corpus['offsets'][song_ids+1] - corpus['offsets'][song_ids]
+        song_of_token = np.repeat(song_ids,num_words)
+        pairs = song_of_token*len(corpus['vocab']) + gather_tokens(corpus,song_ids) #sorted pairs come in song_vocab order
+        pairs, index, counts = np.unique(pairs,return_index=True,return_counts=True)
+        first = index - (corpus['offsets'][pairs//max(len(corpus['vocab']),1)] - corpus['offsets'][first_song])
+        corpus['vocab_counts'] = np.concatenate([corpus.get('vocab_counts',np.zeros(0,dtype=np.int32)),counts.astype(np.int32)])
+        corpus['vocab_first'] = np.concatenate([corpus.get('vocab_first',np.zeros(0,dtype=np.int32)),first.astype(np.int32)])
+    return corpus['vocab_counts'], corpus['vocab_first']
+
+def word_counts(corpus,song_ids,weights=None):
+    '''
+    Occurrences of every word in the joined lyrics of several song appearances, same result as np.unique over
+    gather_tokens(corpus, song_ids) with return_index and return_counts. Built by merging the per-song counts of
+    song_word_counts, each distinct song once weighted by its number of appearances, so a year of a song on the
+    chart costs one song and not 52.
+
+    Input:
+        corpus - output of tokenize_lyrics
+        song_ids - array-like of song ids in chart order, repeats allowed
+        weights - optional array-like with one weight per appearance, an appearance then counts weight times
+            instead of once
+    Output:
+        ids - sorted np.int32 array of word ids
+        counts - np.int64 array, occurrences of every word (np.float64 weighted occurrences with weights)
+        first - np.int64 array, position of the first occurrence of every word in the joined tokens
+    '''
+    song_ids = np.asarray(song_ids,dtype=np.int64)
+    vocab_counts, vocab_first = song_word_counts(corpus)
+    num_words = corpus['offsets'][song_ids+1] - corpus['offsets'][song_ids]
+    starts = np.cumsum(num_words) - num_words #position of every appearance in the joined tokens
+    if weights is None:
+        songs, first_appearance, appearances = np.unique(song_ids,return_index=True,return_counts=True)
+    else:
+        assert len(weights) == len(song_ids),'one weight per song appearance'
+        songs, first_appearance, song_of = np.unique(song_ids,return_index=True,return_inverse=True)
+        appearances = np.bincount(song_of,weights=np.asarray(weights,dtype=float),minlength=len(songs))
+    sizes = corpus['vocab_offsets'][songs+1] - corpus['vocab_offsets'][songs]
+
+    ids = _gather(corpus['song_vocab'],corpus['vocab_offsets'],songs)
+    counts = _gather(vocab_counts,corpus['vocab_offsets'],songs).astype(np.int64)*np.repeat(appearances,sizes)
+    positions = _gather(vocab_first,corpus['vocab_offsets'],songs).astype(np.int64) + np.repeat(starts[first_appearance],sizes)
+    ids, inverse = np.unique(ids,return_inverse=True)
+    first = np.full(len(ids),np.iinfo(np.int64).max,dtype=np.int64)
+    np.minimum.at(first,inverse,positions) #earliest appearance of the word over the songs that use it
+    counts = np.bincount(inverse,weights=counts,minlength=len(ids))
+    return ids, counts.astype(np.int64) if weights is None else counts, first
+
+def punctuation_counts(corpus):
+    '''
+    Count of every character of string.punctuation in the lyrics of every song, from a byte histogram of the utf-8
+    text (punctuation is ascii, and ascii bytes never occur inside a multi-byte character). The counts of a bin are
+    the sum of the rows of its song appearances. Cached in corpus['punct_counts'], songs added since by extend_corpus
+    are counted on the next call.
+
+    Input:
+        corpus - output of tokenize_lyrics
+    Output:
+        np.int64 array of shape (number of songs, len(string.punctuation)), columns in the order of string.punctuation
+    '''
+    known = corpus.get('punct_counts',np.zeros((0,len(string.punctuation)),dtype=np.int64))
+    num_songs = len(corpus['keys'])
+    if 'punct_counts' not in corpus or len(known) != num_songs:
+        lyrics = corpus['lyrics']
+        if hasattr(lyrics,'offsets'): #utf-8 table of a store, no decoding needed
+            offsets = np.asarray(lyrics.offsets[len(known):])
+            data = np.asarray(lyrics.data[offsets[0]:offsets[-1]])
+            offsets = offsets - offsets[0]
+        else:
+            encoded = [lyrics[song_id].encode('utf-8') for song_id in range(len(known),num_songs)]
+            offsets = np.zeros(len(encoded)+1,dtype=np.int64)
+            np.cumsum([len(text) for text in encoded],out=offsets[1:])
+            data = np.frombuffer(b''.join(encoded),dtype=np.uint8)
+        slots = punct_slots[data]
+        positions = np.flatnonzero(slots >= 0)
+        songs = np.searchsorted(offsets,positions,side='right') - 1 #song owning every punctuation byte
+        new = np.bincount(songs*len(string.punctuation) + slots[positions],minlength=(num_songs-len(known))*len(string.punctuation))
+        corpus['punct_counts'] = np.concatenate([known,new.reshape(-1,len(string.punctuation)).astype(np.int64)])
+    return corpus['punct_counts']
+
+def load_chart_entries(song_list,corpus):
+    '''
+    Flattens the weekly chart dictionaries of the Songs pickle into a columnar table with one row per chart entry.
+
+    Input:
+        song_list - the list of weekly dictionaries from billboard_scraping.py, {'Week': 'YYYY-MM-DD', 1: [title, artist], ...}
+        corpus - output of tokenize_lyrics, used to resolve every [title, artist] to a song id
+    Output:
+        entries - pandas.DataFrame in chart order with the columns
+            'week' - datetime64 date of the chart
+            'rank' - int16 chart position (the week dictionary key)
+            'song_id' - int32 corpus song id, -1 when the song has no lyrics in lyric_dict
+            'artist_id' - int32 corpus artist id, -1 when the song has no lyrics in lyric_dict
+        a week without any chart entry keeps a single placeholder row (rank 0, song_id -1) so it still opens its
+        bin, like in to_timeframe
+    '''
+    assert isinstance(song_list,list)
+    assert all([isinstance(week,dict) for week in song_list])
+    assert isinstance(corpus,dict)
+
+    get_id = corpus['song_ids'].get
+    weeks = []
+    ranks = []
+    song_ids = []
+    for week in song_list: #the only pass over the list of dictionaries, everything after is columnar
+        date = week['Week']
+        num_rows = len(weeks)
+        for rank, song in week.items():
+            if isinstance(song,list):
+                weeks.append(date)
+                ranks.append(rank)
+                song_ids.append(get_id(tuple(song),-1))
+        if len(weeks) == num_rows: #placeholder row of an empty week
+            weeks.append(date)
+            ranks.append(0)
+            song_ids.append(-1)
+
+    song_ids = np.array(song_ids,dtype=np.int32)
+    matched = song_ids >= 0
+    artist_ids = np.full(len(song_ids),-1,dtype=np.int32)
+    artist_ids[matched] = corpus['song_artist'][song_ids[matched]]
+
+    entries = pd.DataFrame({'week': pd.to_datetime(pd.Series(weeks,dtype=object),format='%Y-%m-%d'),
+                            'rank': np.array(ranks,dtype=np.int16),
+                            'song_id': song_ids,
+                            'artist_id': artist_ids})
+    return entries
+
+def word_length_hist(corpus):
+    '''
+    Word length histogram of every song, hist[i, l] is the number of words of length l in song i (np.int32, one
+    column per length up to the longest word of the corpus). Bin histograms are weighted sums of these rows.
+    '''
+    num_songs = len(corpus['keys'])
+    num_lengths = int(corpus['word_len'].max())+1 if len(corpus['word_len']) else 1
+    num_words = corpus['offsets'][1:] - corpus['offsets'][:-1]
+    song_of_token = np.repeat(np.arange(num_songs,dtype=np.int64),num_words)
+    cells = song_of_token*num_lengths + corpus['word_len'][np.asarray(corpus['tokens'])]
+    return np.bincount(cells,minlength=num_songs*num_lengths).astype(np.int32).reshape(num_songs,num_lengths)
+
+def timeframe_labels(weeks,timeframe='year'):
+    '''
+    Computes the bin label of every chart date, labels match the keys of to_timeframe
+    ('1958-08-04' for week, '1958-08' for month, '1958' for year, '1950s' for decade).
+
+    Input:
+        weeks - datetime64 pandas.Series or array, e.g. entries['week']
+        timeframe - ['week','month','year', 'decade']
+    Output:
+        numpy array of str labels, one per date
+    '''
+    assert any([timeframe == period for period in ['week','month','year', 'decade']])
+
+    unique_weeks, inverse = np.unique(np.asarray(weeks,dtype='datetime64[ns]'),return_inverse=True) #only ~3,300 distinct dates
+    unique_weeks = pd.DatetimeIndex(unique_weeks)
+    if timeframe == 'decade':
+        labels = np.array([str(year)[0:3]+'0s' for year in unique_weeks.year],dtype=object)
+    else:
+        labels = np.asarray(unique_weeks.strftime({'week':'%Y-%m-%d', 'month':'%Y-%m', 'year':'%Y'}[timeframe]),dtype=object)
+    return labels[inverse.reshape(-1)]
+
+def bin_codes(entries,timeframe='year'):
+    '''
+    Integer bin code of every chart entry.
+
+    Input:
+        entries - output of load_chart_entries
+        timeframe - ['week','month','year', 'decade']
+    Output:
+        codes - np.int64 array, position of the entry's bin in labels
+        labels - list of bin labels in order of first appearance
+    '''
+    codes, labels = pd.factorize(timeframe_labels(entries['week'],timeframe))
+    return codes, list(labels)
+
+def group_entries(entries,timeframe='year'):
+    '''
+    Vectorized group-by of the chart entries table into time bins.
+
+    Input:
+        entries - output of load_chart_entries
+        timeframe - ['week','month','year', 'decade']
+    Output:
+        labels - list of bin labels in order of first appearance
+        groups - list of np.int64 arrays, row positions into entries of each bin in chart order
+    '''
+    codes, labels = bin_codes(entries,timeframe)
+    order = np.argsort(codes,kind='stable')
+    counts = np.bincount(codes,minlength=len(labels))
+    groups = np.split(order,np.cumsum(counts)[:-1]) if len(labels) else []
+    return labels, groups
+
+def song_features(corpus,song_ids=None):
+    '''
+    Computes the additive per-song features once for every song of the corpus. Bin values can then be derived by
+    summing these over the chart appearances of a bin (see lyrics_functions.aggregate_features) without touching
+    any lyric text. Unique word counts of a bin are not additive (they need set unions) and are not stored here.
+
+    Input:
+        corpus - output of tokenize_lyrics
+        song_ids - optional array of song ids to compute, e.g. the output of extend_corpus, every song if None
+    Output:
+        features - pandas.DataFrame indexed by song id with the columns
+            'newlines', 'punctuation', 'parens', 'brackets' - counts in the lyrics
+            'num_words', 'word_len_sum', 'word_len_sq_sum' - number of words, sum of word lengths and of squared word lengths
+            'title_len', 'artist_len' - length of the song title and of the artist name
+    '''
+    assert isinstance(corpus,dict)
+
+    index = pd.RangeIndex(len(corpus['keys']),name='song_id') if song_ids is None else pd.Index(np.asarray(song_ids,dtype=np.int64),name='song_id')
+    song_ids = index.values
+    num_songs = len(song_ids)
+    num_words = corpus['offsets'][song_ids+1] - corpus['offsets'][song_ids]
+    song_of_token = np.repeat(np.arange(num_songs),num_words) #position in song_ids of the song owning every token
+    token_len = corpus['word_len'][gather_tokens(corpus,song_ids)].astype(np.int64)
+    lyrics = [corpus['lyrics'][song_id] for song_id in song_ids]
+    keys = [corpus['keys'][song_id] for song_id in song_ids]
+
+    features = pd.DataFrame(index=index)
+    features['newlines'] = np.array([text.count('\n') for text in lyrics],dtype=np.int64)
+    features['punctuation'] = punctuation_counts(corpus)[song_ids].sum(axis=1)
+    features['parens'] = np.array([len(corpus['parens'][song_id]) for song_id in song_ids],dtype=np.int64)
+    features['brackets'] = np.array([len(corpus['bracketed'][song_id]) for song_id in song_ids],dtype=np.int64)
+    features['num_words'] = num_words.astype(np.int64)
+    features['word_len_sum'] = np.bincount(song_of_token,weights=token_len,minlength=num_songs).astype(np.int64)
+    features['word_len_sq_sum'] = np.bincount(song_of_token,weights=token_len**2,minlength=num_songs).astype(np.int64)
+    features['title_len'] = np.array([len(key[0]) for key in keys],dtype=np.int64)
+    features['artist_len'] = np.array([len(key[1]) for key in keys],dtype=np.int64)
+
+    return features
+
+def save_features(features,fname='Song_Features'):
+    '''
+    Saves the output of song_features to disk with pickle, same as the other data files of the project.
+    '''
+    assert isinstance(features,pd.DataFrame)
+    with open(fname,'wb') as f:
+        pickle.dump(features,f)
+
+def load_features(fname='Song_Features',corpus=None):
+    '''
+    Loads features saved with save_features. If corpus is given the file is checked to belong to it.
+    '''
+    with open(fname,'rb') as f:
+        features = pickle.load(f)
+    assert isinstance(features,pd.DataFrame)
+    if corpus is not None:
+        assert len(features) == len(corpus['keys']),'features were computed for another corpus, rebuild them with song_features()'
+    return features
@@ -1,3 +1,4 @@
+import os
 import pickle
 import re
 import pandas as pd
@@ -5,6 +6,12 @@ import string
 import time
 import numpy as np
 from collections import Counter
+from collections.abc import Iterator
+
+import lyrics_cache
+import lyrics_corpus
+import lyrics_parallel
+import lyrics_sketch
 
 '''
 API to deal with the web scrapped data structures.
@@ -12,134 +19,1138 @@ Workflow follows as:
     billboard_scraping.py -> lyrics_scrp.py -> data structures to use with lyrics_functions.py
 '''
 
-def to_timeframe(song_list,lyric_dict,timeframe='year'):
+# memoization of the analytic functions (lyrics_cache.ResultCache), None to always compute
+result_cache = None
+
+# True re-validates every Dataset each time it is used (see Dataset), for debugging
+strict_validation = False
+
+def to_timeframe(song_list,lyric_dict,timeframe='year',corpus=None):
     '''
     Gathers all information for specific timeframes (week, month, year, decade). The information includes 
-    ['num_songs',titles_authors','lyrics','words','parens','bracketed'] per time period.
+    ['num_songs','titles_authors','song_ids','parens','bracketed','unique_words','corpus'] per time period.
     
     Input:
         song_list - the list of dictionaries loaded from the unpickled file data_final, further description below of this format
         lyric_dict - dictionary of unique songs, generated from function lyrics_to_dict()
         timeframe - indiates over which timeperiod to get the stats, ['week','month','year', 'decade']
+        corpus - optional output of lyrics_corpus.tokenize_lyrics(lyric_dict), pass it in to reuse the tokenization
+            across several calls, it is built here if not given
         
     Output:
         dict_out - dictionary of dictionaries, first dict keys are the timeperiods - values are dicts
-        	second dict keys are ['num_songs',titles_authors','lyrics','words','parens','bracketed'] - 
+        	second dict keys are ['num_songs','titles_authors','song_ids','parens','bracketed','unique_words','corpus'] - 
+        	song_ids is an int32 array with one entry per chart appearance, the lyrics and words of a bin are not copied
+        	into it but read back from the shared corpus with bin_lyrics(), bin_words() and bin_tokens()
         
     iterate over binned output to generate stats for each bin, where a bin is a timeframe
     '''
+    _check_song_data(song_list,lyric_dict)
+    
+    assert any([timeframe == period for period in ['week','month','year', 'decade']])
+    assert isinstance(corpus,(dict,type(None)))
+    
+    if corpus is None: #every song is tokenized once here instead of once per chart appearance
+        corpus = lyrics_corpus.tokenize_lyrics(lyric_dict)
+    entries = lyrics_corpus.load_chart_entries(song_list,corpus)
+    
+    return bin_entries(entries,corpus,timeframe)
+
+def bin_entries(entries,corpus,timeframe='year'):
+    '''
+    Bins the columnar chart entries table with a single vectorized group-by, the output is the same as to_timeframe.
+    Keep entries and corpus around to re-bin at another granularity without rescanning song_list.
+    
+    Input:
+        entries - output of lyrics_corpus.load_chart_entries
+        corpus - output of lyrics_corpus.tokenize_lyrics, the same one used to build entries
+        timeframe - indiates over which timeperiod to get the stats, ['week','month','year', 'decade']
+        
+    Output:
+        dict_out - dictionary of dictionaries, see to_timeframe
+    
+    example:
+        entries = lyrics_corpus.load_chart_entries(songs,corpus)
+        binned_month = bin_entries(entries,corpus,'month')
+        binned_decade = bin_entries(entries,corpus,'decade')
+    '''
+    assert isinstance(entries,pd.DataFrame)
+    assert isinstance(corpus,dict)
+    assert any([timeframe == period for period in ['week','month','year', 'decade']])
+    
+    return dict(iter_entries(entries,corpus,timeframe))
+
+def iter_timeframe(song_list,lyric_dict,timeframe='year',corpus=None):
+    '''
+    Lazy version of to_timeframe, yields the (timeframe, bin) pairs one at a time in time order. A bin is only built
+    when it is requested and can be freed as soon as the caller moves on, so memory stays bounded by the largest bin
+    instead of the whole binned dictionary. Every analytic function accepts the iterator as binned.
+    
+    Input:
+        same as to_timeframe
+    Output:
+        generator of (timeframe, bin) pairs, dict(iter_timeframe(...)) == to_timeframe(...)
+    
+    example:
+        for tf, tf_bin in iter_timeframe(songs,lyric_dict,'week',corpus=corpus):
+            ...
+        count_newlines(binned=iter_timeframe(songs,lyric_dict,'week',corpus=corpus))
+    '''
+    _check_song_data(song_list,lyric_dict)
+    
+    assert any([timeframe == period for period in ['week','month','year', 'decade']])
+    assert isinstance(corpus,(dict,type(None)))
+    
+    if corpus is None:
+        corpus = lyrics_corpus.tokenize_lyrics(lyric_dict)
+    entries = lyrics_corpus.load_chart_entries(song_list,corpus)
+    
+    return iter_entries(entries,corpus,timeframe)
+
+def iter_entries(entries,corpus,timeframe='year'):
+    '''
+    Lazy version of bin_entries, yields the (timeframe, bin) pairs one at a time in time order, see iter_timeframe.
+    '''
+    assert isinstance(entries,pd.DataFrame)
+    assert isinstance(corpus,dict)
+    assert any([timeframe == period for period in ['week','month','year', 'decade']])
+    
+    labels, bin_ids = _bin_song_ids(entries,timeframe)
+    for tf, ids in zip(labels,bin_ids):
+        yield tf, _make_bin(corpus,ids)
+
+def _bin_song_ids(entries,timeframe):
+    '''
+    Labels of the bins and the song ids of every bin, entries without lyrics still open their bin but are not counted.
+    '''
+    song_ids = entries['song_id'].values
+    labels, groups = lyrics_corpus.group_entries(entries,timeframe)
+    bin_ids = [song_ids[rows] for rows in groups]
+    return labels, [ids[ids >= 0] for ids in bin_ids]
+
+def _make_bin(corpus,ids):
+    '''
+    Builds a single bin of to_timeframe output from the song ids of its chart appearances.
+    '''
+    keys = corpus['keys']
+    parens = corpus['parens']
+    bracketed = corpus['bracketed']
+    
+    tf_bin = {}
+    tf_bin['num_songs'] = len(ids)
+    tf_bin['titles_authors'] = [list(keys[song_id]) for song_id in ids]
+    tf_bin['song_ids'] = ids
+    tf_bin['parens'] = [paren for song_id in ids for paren in parens[song_id]]
+    tf_bin['bracketed'] = [bracket for song_id in ids for bracket in bracketed[song_id]]
+    tf_bin['unique_words'] = corpus['num_unique'][ids].tolist()
+    tf_bin['corpus'] = corpus
+    return tf_bin
+
+def _raw_entries(raw_data):
+    '''
+    Validates the raw_data argument of the analytic functions and flattens it to the chart entries table.
+    
+    Input:
+        raw_data - list of 3 elements, either [song_list, lyric_dict, timeframe] which is tokenized and flattened here,
+            or [entries, corpus, timeframe] from lyrics_corpus which is returned as is, or [dataset, timeframe] with a
+            Dataset
+    Output:
+        entries, corpus, timeframe - the arguments of bin_entries
+    '''
+    assert isinstance(raw_data,list)
+    if len(raw_data)==2 and isinstance(raw_data[0],Dataset): #validated, tokenized and flattened when it was built
+        assert any([raw_data[1] == period for period in ['week','month','year', 'decade']])
+        raw_data[0].check()
+        return raw_data[0].entries, raw_data[0].corpus, raw_data[1]
+    
+    assert (len(raw_data)==3)
+    assert any([raw_data[2] == period for period in ['week','month','year', 'decade']])
+    
+    if isinstance(raw_data[0],pd.DataFrame): #already flattened, only the group-by is left to do
+        assert isinstance(raw_data[1],dict)
+        return raw_data[0], raw_data[1], raw_data[2]
+    
+    _check_song_data(raw_data[0],raw_data[1])
+    corpus = lyrics_corpus.tokenize_lyrics(raw_data[1])
+    return lyrics_corpus.load_chart_entries(raw_data[0],corpus), corpus, raw_data[2]
+
+def _bin_raw_data(raw_data):
+    '''
+    Validates the raw_data argument of the analytic functions and bins it, see _raw_entries.
+    '''
+    entries, corpus, timeframe = _raw_entries(raw_data)
+    return bin_entries(entries,corpus,timeframe=timeframe)
+
+def _check_song_data(song_list,lyric_dict):
+    '''
+    Type checks of song_list and lyric_dict, a sweep over every week and every song.
+    '''
     assert isinstance(song_list,list)
     assert all([isinstance(week,dict) for week in song_list])
     
     assert isinstance(lyric_dict,dict)
     assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(lyric_dict.values(),lyric_dict.keys())])
+
+class Dataset:
+    '''
+    song_list and lyric_dict checked once, with their corpus and chart entries built once. Pass it to the analytic
+    functions as raw_data=[dataset, timeframe] to skip the type sweeps, the tokenization and the flattening that
+    raw_data=[song_list, lyric_dict, timeframe] redoes on every call. song_list and lyric_dict must not be changed
+    once the dataset is built (its corpus, entries and result_cache fingerprint are not rebuilt), build a new one instead.
     
+    Input:
+        song_list - the list of weekly dictionaries, same as to_timeframe
+        lyric_dict - dictionary of unique songs, same as to_timeframe
+        corpus - optional output of lyrics_corpus.tokenize_lyrics(lyric_dict), built here if not given
+        strict - bool, True checks song_list and lyric_dict again every time the dataset is used and fails if
+            they were resized since, for debugging; strict_validation = True does the same for every dataset
+    
+    example:
+        dataset = Dataset(songs,lyric_dict)
+        avg_wrd_len(raw_data=[dataset,'year'])
+        compute_metrics(['count_newlines','variance_words'],raw_data=[dataset,'week'])
+        binned = dataset.bins('month')
+    '''
+    def __init__(self,song_list,lyric_dict,corpus=None,strict=False):
+        _check_song_data(song_list,lyric_dict)
+        assert isinstance(corpus,(dict,type(None)))
+        assert isinstance(strict,bool)
+        self.song_list = song_list
+        self.lyric_dict = lyric_dict
+        self.strict = strict
+        self.corpus = lyrics_corpus.tokenize_lyrics(lyric_dict) if corpus is None else corpus
+        self.entries = lyrics_corpus.load_chart_entries(song_list,self.corpus)
+        self.sizes = (len(song_list),len(lyric_dict))
+        self._fingerprint = None
+    
+    def check(self):
+        '''
+        Called by every function using the dataset, only re-validates in strict mode.
+        '''
+        if self.strict or strict_validation:
+            _check_song_data(self.song_list,self.lyric_dict)
+            assert (len(self.song_list),len(self.lyric_dict)) == self.sizes,'song_list or lyric_dict changed since the Dataset was built, build a new one'
+    
+    def fingerprint(self):
+        '''
+        Content hash of song_list and lyric_dict (lyrics_cache.fingerprint), computed once.
+        '''
+        if self._fingerprint is None or self.strict or strict_validation:
+            self._fingerprint = lyrics_cache.fingerprint(self.song_list,self.lyric_dict)
+        return self._fingerprint
+    
+    def bins(self,timeframe='year'):
+        '''
+        Same as to_timeframe(song_list,lyric_dict,timeframe), from the entries built once.
+        '''
+        self.check()
+        return bin_entries(self.entries,self.corpus,timeframe)
+    
+    def iter_bins(self,timeframe='year'):
+        '''
+        Same as iter_timeframe(song_list,lyric_dict,timeframe), from the entries built once.
+        '''
+        self.check()
+        return iter_entries(self.entries,self.corpus,timeframe)
+
+def bin_tokens(tf_bin):
+    '''
+    Returns the int32 word ids of every song appearance in a single bin of to_timeframe output.
+    '''
+    return lyrics_corpus.gather_tokens(tf_bin['corpus'],tf_bin['song_ids'])
+
+def bin_words(tf_bin):
+    '''
+    Returns the list of words of every song appearance in a single bin of to_timeframe output,
+    same content as the 'words' entry bins used to carry.
+    '''
+    vocab = tf_bin['corpus']['vocab']
+    return [vocab[word_id] for word_id in bin_tokens(tf_bin)]
+
+def bin_vocabulary(tf_bin):
+    '''
+    Returns the sorted int32 word ids of the distinct words of a single bin, built by merging the vocabularies of the
+    distinct songs of the bin. Vocabularies of several bins merge with np.union1d.
+    '''
+    return lyrics_corpus.vocabulary(tf_bin['corpus'],tf_bin['song_ids'])
+
+def bin_word_counts(tf_bin):
+    '''
+    Returns the sorted int32 word ids of a single bin with their number of occurrences and the position of their
+    first occurrence in the bin's joined tokens, merged from the per-song counts (lyrics_corpus.word_counts).
+    '''
+    return lyrics_corpus.word_counts(tf_bin['corpus'],tf_bin['song_ids'])
+
+def bin_sketch(tf_bin,precision=12):
+    '''
+    Returns a HyperLogLog sketch (lyrics_sketch) of the distinct words of a single bin, a 2**precision byte array.
+    Sketches of several bins, or of bins computed on other machines, merge with lyrics_sketch.hll_merge.
+    '''
+    corpus = tf_bin['corpus']
+    registers = lyrics_sketch.hll_new(precision)
+    index, rank = lyrics_sketch.word_registers(corpus,precision)
+    #the vocabularies of the distinct songs back to back, repeated words are harmless to a sketch so nothing is sorted
+    word_ids = lyrics_corpus._gather(corpus['song_vocab'],corpus['vocab_offsets'],np.unique(tf_bin['song_ids']))
+    np.maximum.at(registers,index[word_ids],rank[word_ids])
+    return registers
+
+def bin_lyrics(tf_bin):
+    '''
+    Returns the joined lyrics string of every song appearance in a single bin of to_timeframe output,
+    same content as the 'lyrics' entry bins used to carry.
+    '''
+    lyrics = tf_bin['corpus']['lyrics']
+    return ''.join([lyrics[song_id] for song_id in tf_bin['song_ids']])
+
+    
+def aggregate_features(entries,features,timeframe='year',weights=None):
+    '''
+    Computes the additive metrics of every bin from the per-song feature store, as weighted sums over the chart
+    appearances of each bin. No lyric text is touched, so answering the same questions by month or by decade only
+    costs a group-by over the entries table.
+    
+    Input:
+        entries - output of lyrics_corpus.load_chart_entries
+        features - output of lyrics_corpus.song_features (or load_features) for the same corpus
+        timeframe - indiates over which timeperiod to get the stats, ['week','month','year', 'decade']
+        weights - optional array with one weight per row of entries (e.g. chart_weights), every chart appearance
+            then counts weight times instead of once, the counts become weighted sums and the averages weighted means
+        
+    Output:
+        dataframe - column headers are the bin labels (same as to_timeframe keys), rows are
+            'Num_Songs', 'Num_Words', 'Num_Newlines', 'Num_Brackets', 'Num_Parentheticals', 'Num_Punctuation',
+            'Avg_Word_Len', 'Variance_word_length' (over all words, same as unique=False), 'Avg_title_length', 'Avg_artist_name_length'
+    
+    example:
+        features = lyrics_corpus.song_features(corpus)
+        by_month = aggregate_features(entries,features,'month')
+        by_exposure = aggregate_features(entries,features,'year',weights=chart_weights(entries,'linear'))
+    '''
+    assert isinstance(entries,pd.DataFrame)
+    assert isinstance(features,pd.DataFrame)
     assert any([timeframe == period for period in ['week','month','year', 'decade']])
+    assert weights is None or len(weights) == len(entries),'one weight per chart entry'
+    
+    codes, labels = lyrics_corpus.bin_codes(entries,timeframe)
+    song_ids = entries['song_id'].values
+    matched = song_ids >= 0
+    codes = codes[matched]
+    song_ids = song_ids[matched]
+    weights = np.ones(len(song_ids)) if weights is None else np.asarray(weights,dtype=float)[matched]
+    
+    num_songs = np.bincount(codes,weights=weights,minlength=len(labels))
+    sums = {column: np.bincount(codes,weights=weights*features[column].values[song_ids],minlength=len(labels)) for column in FEATURE_COLUMNS}
+    return pd.DataFrame.from_dict(_feature_rows(num_songs,sums),orient='index',columns=labels)
+
+def chart_weights(entries,rank='linear',weeks_on_chart=False,chart_size=None):
+    '''
+    Weight of every chart entry by its chart position and/or its weeks on the chart, for aggregate_features and
+    weighted_metrics.
     
-    time = {'year':0, 'month':1, 'week':2, 'decade':0}[timeframe]   
-    binned = {}
-    current_time = -1
-    
-    translator = str.maketrans('','',string.punctuation) #remove punctuation
-    trans_newline = str.maketrans('\n',' ') #replace newline with space
-    
-    for i, week in enumerate(song_list):
-        tf = '-'.join(week['Week'].split('-')[0:time+1])
-        if timeframe == 'decade':
-            tf = tf[0:3]+"0s"
-        #print(tf)
-        if tf != current_time: #create new bin
-            binned[tf] = {}
-            binned[tf]['num_songs'] = 0
-            binned[tf]['titles_authors'] = []
-            binned[tf]['lyrics'] = []
-            binned[tf]['parens'] = []
-            binned[tf]['bracketed'] = []
-            binned[tf]['words'] = []
-            binned[tf]['unique_words'] = []
-            
-            
-            if i!= 0:#Change from string concatenation since slow, new method is append to lists then join
-                #Check here for more info:
-                #https://stackoverflow.com/questions/3055477/how-slow-is-pythons-string-concatenation-vs-str-join
-                binned[current_time]['lyrics'] = ''.join(binned[current_time]['lyrics'])
-
-        for song in week.values(): #update values for specific tf
-            if isinstance(song,list) and tuple(song) in lyric_dict.keys():
-                binned[tf]['num_songs'] += 1
-                binned[tf]['titles_authors'].append(song)
-                binned[tf]['lyrics'].append(lyric_dict[tuple(song)][1])
-                song_words = lyric_dict[tuple(song)][1].translate(translator).translate(trans_newline).lower().split() #list of words
-
-                binned[tf]['unique_words'].append(len(set(song_words)))
-                binned[tf]['words'] += song_words
-                
-                for paren in lyric_dict[tuple(song)][2]:
-                    binned[tf]['parens'].append(paren)
-                for bracket in lyric_dict[tuple(song)][3]:
-                    binned[tf]['bracketed'].append(bracket)
-
-        current_time = tf
-         
-    #Have to join last element at end of for loop, is not caught with
-    binned[current_time]['lyrics'] = ''.join(binned[current_time]['lyrics'])
-    
-    return binned
-
-    
-def count_newlines(binned=None,dataframe=None,raw_data=None):
+    Input:
+        entries - output of lyrics_corpus.load_chart_entries
+        rank - weighting by chart position:
+            None - every position weighs 1
+            'linear' - chart_size + 1 - rank, the number 1 weighs chart_size and the last position 1
+            'inverse' - 1 / rank
+        weeks_on_chart - bool, also multiplies by the number of weeks the song has been on the chart so far
+            (1 the week it enters the chart, counted over the weeks of entries)
+        chart_size - number of positions of the chart, the largest rank of entries if None
+    Output:
+        weights - np.float64 array with one weight per row of entries, 0 for the placeholder rows of empty weeks
     '''
-    Counts the number of new line characters in the lyrics per time period.
+    assert isinstance(entries,pd.DataFrame)
+    assert rank in [None,'linear','inverse']
+    assert isinstance(weeks_on_chart,bool)
+    
+    ranks = entries['rank'].values.astype(float)
+    if rank is None:
+        weights = np.ones(len(entries))
+    elif rank == 'linear':
+        chart_size = (ranks.max() if len(ranks) else 0) if chart_size is None else chart_size
+        weights = np.maximum(chart_size + 1 - ranks,0)
+    else:
+        weights = np.divide(1,ranks,out=np.zeros(len(ranks)),where=ranks > 0)
+    weights[ranks == 0] = 0 #placeholder rows of empty weeks
+    if weeks_on_chart: #entries are in chart order, so the running count of a song's rows is its weeks on the chart
+        weights = weights*(entries.groupby('song_id').cumcount().values + 1)
+    return weights
 
-    3 input methods
+def weighted_metrics(entries,corpus,weights,timeframe='year',features=None,num_words=10,omit_words=["i", "and","she","he","that","this","a","they","you"]):
+    '''
+    Metrics of every bin with one weight per chart entry, e.g. exposure weighted word lengths with
+    chart_weights(entries,'linear'). An entry of weight 2 gives the same result as the entry listed twice, without
+    duplicating anything: the sums are weighted bincounts over the entries, the word length distribution of a bin is
+    the weighted sum of per-song histograms (lyrics_corpus.word_length_hist) and the word counts merge the per-song
+    counts with the weights of their appearances (lyrics_corpus.word_counts).
+    
+    Input:
+        entries - output of lyrics_corpus.load_chart_entries (or Dataset.entries)
+        corpus - output of lyrics_corpus.tokenize_lyrics, the same one used to build entries (or Dataset.corpus)
+        weights - array with one weight per row of entries, e.g. chart_weights(entries)
+        timeframe - indiates over which timeperiod to get the stats, ['week','month','year', 'decade']
+        features - optional output of lyrics_corpus.song_features(corpus), computed here if not given
+        num_words, omit_words - the weighted most repeated words, as in sort_word_len, 0 to leave them out
+    Output:
+        dataframe - column headers are the bin labels, rows are the rows of aggregate_features with the weights
+            ('Num_Songs' is the total weight), then 'Median_Word_Len' (over all words, same as unique=False) and the
+            '{i}_most_repeated_words' rows with weighted counts
+    
+    example:
+        weights = chart_weights(dataset.entries,'linear',weeks_on_chart=True)
+        weighted_metrics(dataset.entries,dataset.corpus,weights,'decade').loc['Avg_Word_Len']
+    '''
+    assert isinstance(entries,pd.DataFrame)
+    assert isinstance(corpus,dict)
+    assert len(weights) == len(entries),'one weight per chart entry'
+    assert isinstance(omit_words,(list,type(None)))
+    if isinstance(omit_words,list):
+        assert all([isinstance(word,str) and len(word)>0 for word in omit_words])
+    
+    features = lyrics_corpus.song_features(corpus) if features is None else features
+    dataframe = aggregate_features(entries,features,timeframe,weights)
+    
+    codes, labels = lyrics_corpus.bin_codes(entries,timeframe)
+    song_ids = entries['song_id'].values
+    matched = song_ids >= 0
+    codes, song_ids, weights = codes[matched], song_ids[matched], np.asarray(weights,dtype=float)[matched]
+    
+    #weighted word length histogram of every bin, one length at a time so no (entries x lengths) array is built
+    song_hist = lyrics_corpus.word_length_hist(corpus)
+    bin_hist = np.zeros((len(labels),song_hist.shape[1]))
+    for length in range(song_hist.shape[1]):
+        bin_hist[:,length] = np.bincount(codes,weights=weights*song_hist[song_ids,length],minlength=len(labels))
+    rows = {'Median_Word_Len': [_hist_stats(hist)[1] for hist in bin_hist]}
+    
+    if num_words > 0:
+        order = np.argsort(codes,kind='stable')
+        bounds = np.concatenate([[0],np.cumsum(np.bincount(codes,minlength=len(labels)))])
+        omitted = _word_mask(corpus,omit_words) if omit_words else np.zeros(len(corpus['vocab']),dtype=bool)
+        tops = []
+        for b in range(len(labels)):
+            rows_b = order[bounds[b]:bounds[b+1]]
+            ids, counts, first = lyrics_corpus.word_counts(corpus,song_ids[rows_b],weights[rows_b])
+            keep = ~omitted[ids] & (counts > 0)
+            ids, counts, first = ids[keep], counts[keep], first[keep]
+            top = np.lexsort((first,-counts))[:num_words] #ties keep first occurrence order like sort_word_len
+            tops.append([(corpus['vocab'][ids[j]], float(counts[j])) for j in top])
+        for i in range(num_words):
+            rows[f'{i+1}_most_repeated_words'] = [top[i] if i < len(top) else None for top in tops]
+    
+    return _fill_rows(dataframe,[[(row_name, values[c]) for row_name, values in rows.items()] for c in range(len(labels))])
+
+FEATURE_COLUMNS = ['newlines','punctuation','parens','brackets','num_words','word_len_sum','word_len_sq_sum','title_len','artist_len']
+
+def _feature_rows(num_songs,sums):
+    '''
+    Rows of aggregate_features from the number of songs and the sums of every feature column over the chart
+    appearances of each bin (arrays with one value per bin).
+    '''
+    num_words = sums['num_words']
+    with np.errstate(invalid='ignore',divide='ignore'): #empty bins give nan like np.mean([])
+        avg_len = sums['word_len_sum']/num_words
+        return {
+            'Num_Songs': num_songs,
+            'Num_Words': num_words,
+            'Num_Newlines': sums['newlines'],
+            'Num_Brackets': sums['brackets'],
+            'Num_Parentheticals': sums['parens'],
+            'Num_Punctuation': sums['punctuation'],
+            'Avg_Word_Len': avg_len,
+            'Variance_word_length': sums['word_len_sq_sum']/num_words - avg_len**2,
+            'Avg_title_length': sums['title_len']/num_songs,
+            'Avg_artist_name_length': sums['artist_len']/num_songs,
+        }
+
+def build_aggregates(song_list,lyric_dict,timeframes=['week','month','year','decade'],word_counts=['year','decade'],precision=12):
+    '''
+    Builds the persistent per-bin aggregates that update_aggregates keeps current as new chart weeks are scraped:
+    for every bin of every timeframe, the number of songs, the sums of every per-song feature (lyrics_corpus.song_features),
+    a Counter of the songs, a Counter of the words (for the timeframes in word_counts) and a HyperLogLog sketch of
+    the distinct words. Read them back as a dataframe with aggregates_frame, save them with save_aggregates.
+    
+    Input:
+        song_list - the list of weekly dictionaries, same as to_timeframe
+        lyric_dict - dictionary of unique songs, same as to_timeframe
+        timeframes - list of timeframes to keep, any of ['week','month','year', 'decade']
+        word_counts - timeframes that also keep a word Counter per bin (for the most repeated words), a Counter of
+            every distinct word of every week takes a lot of memory, so weeks are left out by default
+        precision - precision of the distinct word sketches, see lyrics_sketch.hll_new
+    Output:
+        state - dictionary with the keys 'corpus', 'features', 'timeframes', 'word_counts', 'precision' and 'bins',
+            state['bins'][timeframe][label] holds the aggregates of one bin
+    
+    example:
+        state = build_aggregates(songs,lyric_dict)
+        save_aggregates(state)
+        ...
+        state = load_aggregates()
+        update_aggregates(state,new_weeks,new_lyric_dict)
+        by_year = aggregates_frame(state,'year')
+    '''
+    assert isinstance(timeframes,list) and all([tf in ['week','month','year', 'decade'] for tf in timeframes])
+    assert isinstance(word_counts,list) and all([tf in timeframes for tf in word_counts])
+    
+    corpus = lyrics_corpus.tokenize_lyrics({})
+    state = {}
+    state['corpus'] = corpus
+    state['features'] = lyrics_corpus.song_features(corpus)
+    state['timeframes'] = timeframes
+    state['word_counts'] = word_counts
+    state['precision'] = precision
+    state['bins'] = {tf: {} for tf in timeframes}
+    update_aggregates(state,song_list,lyric_dict)
+    return state
+
+def update_aggregates(state,new_weeks,new_lyric_dict):
+    '''
+    Adds newly scraped chart weeks to the aggregates of build_aggregates, in place. Only the new songs are tokenized
+    and only the bins of the new weeks (their week, month, year and decade) are touched, so the cost is proportional
+    to the new data and not to the whole history.
+    
+    Input:
+        state - output of build_aggregates or load_aggregates
+        new_weeks - list of weekly dictionaries that were not added before
+        new_lyric_dict - dictionary of songs with the lyrics of the new weeks, songs already known are skipped
+    Output:
+        updated - dictionary timeframe -> list of the labels of the bins that changed
+    '''
+    assert isinstance(state,dict)
+    assert isinstance(new_weeks,list)
+    assert all([isinstance(week,dict) for week in new_weeks])
+    
+    corpus = state['corpus']
+    new_ids = lyrics_corpus.extend_corpus(corpus,new_lyric_dict)
+    if len(new_ids) > 0:
+        state['features'] = pd.concat([state['features'],lyrics_corpus.song_features(corpus,new_ids)])
+    features = state['features'][FEATURE_COLUMNS].values
+    hashes = lyrics_sketch.word_hashes(corpus)
+    entries = lyrics_corpus.load_chart_entries(new_weeks,corpus)
+    
+    updated = {}
+    for tf in state['timeframes']:
+        labels, bin_ids = _bin_song_ids(entries,tf)
+        for label, ids in zip(labels,bin_ids):
+            if label not in state['bins'][tf]:
+                state['bins'][tf][label] = {'num_songs': 0, 'sums': np.zeros(len(FEATURE_COLUMNS)), 'songs': Counter(),
+                                            'words': Counter() if tf in state['word_counts'] else None,
+                                            'sketch': lyrics_sketch.hll_new(state['precision'])}
+            aggregate = state['bins'][tf][label]
+            aggregate['num_songs'] += len(ids)
+            aggregate['sums'] += features[ids].sum(axis=0)
+            aggregate['songs'].update(ids.tolist())
+            if aggregate['words'] is not None:
+                word_ids, counts, first = lyrics_corpus.word_counts(corpus,ids)
+                order = np.argsort(first) #insert new words in order of first occurrence, so ties rank like sort_word_len
+                aggregate['words'].update(dict(zip(word_ids[order].tolist(),counts[order].tolist())))
+            lyrics_sketch.hll_add(aggregate['sketch'],hashes[lyrics_corpus.vocabulary(corpus,ids)])
+        updated[tf] = labels
+        state.setdefault('changed',{}).setdefault(tf,set()).update(labels) #bins save_aggregates has to write again
+    return updated
+
+def aggregates_frame(state,timeframe='year',labels=None,num_words=10,num_songs=10,omit_words=["i", "and","she","he","that","this","a","they","you"]):
+    '''
+    Dataframe of the aggregates of one timeframe.
+    
+    Input:
+        state - output of build_aggregates, update_aggregates or load_aggregates
+        timeframe - one of state['timeframes']
+        labels - list of bin labels to include, e.g. the output of update_aggregates for that timeframe, None for every bin
+        num_words, omit_words - used for the most repeated words, as in sort_word_len
+        num_songs - used for the most repeated songs, as in num_song_repeats
+    Output:
+        dataframe - column headers are the bin labels, rows are the rows of aggregate_features, then 'Approx_unique_words',
+            then the '{i}_most_repeated_words' rows (when the timeframe keeps word counts) and the '{i}_most_repeated_songs' rows
+    '''
+    assert timeframe in state['timeframes']
+    bins = state['bins'][timeframe]
+    labels = list(bins.keys()) if labels is None else labels
+    assert all([label in bins for label in labels])
+    
+    corpus = state['corpus']
+    omit_ids = set([corpus['word_ids'][word] for word in (omit_words or []) if word in corpus['word_ids']])
+    sums = np.array([bins[label]['sums'] for label in labels]).reshape(len(labels),len(FEATURE_COLUMNS))
+    feature_rows = _feature_rows(np.array([bins[label]['num_songs'] for label in labels],dtype=float),
+                                 {column: sums[:,j] for j, column in enumerate(FEATURE_COLUMNS)})
+    
+    bin_rows = []
+    for i, label in enumerate(labels):
+        aggregate = bins[label]
+        rows = [(row_name, values[i]) for row_name, values in feature_rows.items()]
+        rows.append(('Approx_unique_words', lyrics_sketch.hll_count(aggregate['sketch'])))
+        if aggregate['words'] is not None:
+            top = [(corpus['vocab'][word_id], count) for word_id, count in aggregate['words'].most_common(num_words+len(omit_ids)) if word_id not in omit_ids][:num_words]
+            rows.extend([(f'{j+1}_most_repeated_words', top[j] if j < len(top) else None) for j in range(num_words)])
+        top = [(', '.join(corpus['keys'][song_id]), count) for song_id, count in aggregate['songs'].most_common(num_songs)]
+        rows.extend([(f'{j+1}_most_repeated_songs', top[j] if j < len(top) else None) for j in range(num_songs)])
+        bin_rows.append(rows)
+    
+    return _fill_rows(pd.DataFrame(columns=labels),bin_rows)
+
+AGGREGATES_HEADER = b'aggregates log 1\n'
+
+def save_aggregates(state,fname='Aggregates',full=False):
+    '''
+    Saves the output of build_aggregates or update_aggregates to disk with pickle, as an append-only log. The first
+    save writes the whole state. Later saves of the same state to the same file append one record with only the
+    songs added since the last save and the bins that update_aggregates changed since then, so saving after a weekly
+    update costs about one week of data instead of the whole history. load_aggregates replays the log.
+    
+    Input:
+        state - output of build_aggregates, update_aggregates or load_aggregates
+        fname - file name
+        full - True to write the whole state again, which compacts a log that grew long
+    '''
+    assert isinstance(state,dict)
+    corpus = state['corpus']
+    saved = state.get('saved')
+    if full or saved is None or saved['fname'] != fname or not os.path.exists(fname):
+        snapshot = {key: value for key, value in state.items() if key not in ['saved','changed']}
+        snapshot['corpus'] = {key: value for key, value in corpus.items() if key != 'buffers'} #spare capacity is not saved
+        with open(fname + '.tmp','wb') as f:
+            f.write(AGGREGATES_HEADER)
+            _write_record(f,{'state': snapshot})
+        os.replace(fname + '.tmp',fname) #a crash leaves the old file
+    else:
+        songs = {key: [', '.join(key),corpus['lyrics'][i],corpus['parens'][i],corpus['bracketed'][i]]
+                 for i, key in enumerate(corpus['keys'][saved['num_songs']:],saved['num_songs'])}
+        bins = {tf: {label: aggregate for label, aggregate in state['bins'][tf].items() if label in labels} #in the order of the state
+                for tf, labels in state.get('changed',{}).items()}
+        with open(fname,'ab') as f:
+            _write_record(f,{'songs': songs, 'bins': bins})
+    state['saved'] = {'fname': fname, 'num_songs': len(corpus['keys'])}
+    state['changed'] = {}
+
+def load_aggregates(fname='Aggregates'):
+    '''
+    Loads aggregates saved with save_aggregates: reads the whole state, then adds the songs and replaces the bins of
+    every record appended after it. A record cut short by a crash while saving is dropped, the save can be repeated.
+    Files written by a single pickle.dump of the state are read as well.
+    '''
+    with open(fname,'rb') as f:
+        if f.read(len(AGGREGATES_HEADER)) != AGGREGATES_HEADER:
+            f.seek(0)
+            state = pickle.load(f)
+            assert isinstance(state,dict) and 'bins' in state
+            return state
+        state = _read_record(f)['state']
+        assert isinstance(state,dict) and 'bins' in state
+        corpus = state['corpus']
+        end = f.tell()
+        while True:
+            record = _read_record(f)
+            if record is None:
+                break
+            new_ids = lyrics_corpus.extend_corpus(corpus,record['songs'])
+            if len(new_ids) > 0:
+                state['features'] = pd.concat([state['features'],lyrics_corpus.song_features(corpus,new_ids)])
+            for tf, bins in record['bins'].items():
+                state['bins'][tf].update(bins)
+            end = f.tell()
+    if end < os.path.getsize(fname): #torn last record, appending after it would hide every later record
+        os.truncate(fname,end)
+    state['saved'] = {'fname': fname, 'num_songs': len(corpus['keys'])}
+    state['changed'] = {}
+    return state
+
+def _write_record(f,record):
+    '''
+    Appends one record to an aggregates log, its pickle preceded by its length in bytes.
+    '''
+    data = pickle.dumps(record)
+    f.write(len(data).to_bytes(8,'little') + data)
+    f.flush()
+    os.fsync(f.fileno())
+
+def _read_record(f):
+    '''
+    Reads the next record of an aggregates log, None at the end of the file or when the last record is incomplete.
+    A complete record that does not unpickle raises, the records after it are not dropped.
+    '''
+    size = f.read(8)
+    if len(size) < 8:
+        return None
+    data = f.read(int.from_bytes(size,'little'))
+    if len(data) < int.from_bytes(size,'little'):
+        return None
+    return pickle.loads(data)
+
+def _hist_stats(hist):
+    '''
+    Mean, median and variance of word lengths from a histogram of lengths (hist[l] = number of words of length l),
+    matches np.mean, np.median and np.var over the expanded list of lengths.
+    '''
+    n = hist.sum()
+    if n == 0:
+        return np.nan, np.nan, np.nan
+    lengths = np.arange(len(hist))
+    mean = (lengths*hist).sum()/n
+    var = (hist*(lengths-mean)**2).sum()/n
+    cum = np.cumsum(hist) #value at sorted position k is the first length whose cumulative count passes k
+    median = (np.searchsorted(cum,(n-1)//2,side='right') + np.searchsorted(cum,n//2,side='right'))/2
+    return mean, median, var
+
+#intermediates computed at most once per bin and shared by every metric that needs them
+_SHARED = {
+    'lyrics': lambda tf_bin,shared: bin_lyrics(tf_bin),
+    'tokens': lambda tf_bin,shared: bin_tokens(tf_bin),
+    'word_counts': lambda tf_bin,shared: bin_word_counts(tf_bin), #sorted unique word ids, their counts and first position in the bin
+    'unique_ids': lambda tf_bin,shared: bin_vocabulary(tf_bin), #same ids as word_counts[0] without counting every token
+    'len_stats': lambda tf_bin,shared: _hist_stats(np.bincount(tf_bin['corpus']['word_len'][_shared(tf_bin,shared,'tokens')])),
+    'unique_len_stats': lambda tf_bin,shared: _hist_stats(np.bincount(tf_bin['corpus']['word_len'][_shared(tf_bin,shared,'unique_ids')])),
+}
+
+def _shared(tf_bin,shared,name):
+    if name not in shared:
+        shared[name] = _SHARED[name](tf_bin,shared)
+    return shared[name]
+
+def _len_stat(position):
+    def metric(tf_bin,shared,params):
+        return _shared(tf_bin,shared,'unique_len_stats' if params['unique'] else 'len_stats')[position]
+    return metric
+
+def _punctuation_rows(tf_bin,shared,params):
+    counts = lyrics_corpus.punctuation_counts(tf_bin['corpus'])[tf_bin['song_ids']].sum(axis=0)
+    return [(f'Counted_{punct}', count) for punct, count in zip(string.punctuation,counts.tolist())]
+
+def _punctuation_matrix(binned,raw_data):
+    '''
+    Bin labels and np.int64 array (bins x len(string.punctuation)) of the punctuation counts of every bin. With
+    raw_data the counts are summed straight from the chart entries, without building the bins.
+    '''
+    if binned == None:
+        entries, corpus, timeframe = _raw_entries(raw_data)
+        codes, labels = lyrics_corpus.bin_codes(entries,timeframe)
+        song_ids = entries['song_id'].values
+        valid = song_ids >= 0
+        matrix = np.zeros((len(labels),len(string.punctuation)),dtype=np.int64)
+        np.add.at(matrix,codes[valid],lyrics_corpus.punctuation_counts(corpus)[song_ids[valid]])
+        return labels, matrix
+    items = list(binned.items()) if isinstance(binned,dict) else binned
+    labels = []
+    matrix = []
+    for tf, tf_bin in items:
+        labels.append(tf)
+        matrix.append(lyrics_corpus.punctuation_counts(tf_bin['corpus'])[tf_bin['song_ids']].sum(axis=0))
+    return labels, np.array(matrix,dtype=np.int64).reshape(len(labels),len(string.punctuation))
+
+HH_BATCH = 256 #songs added to the heavy hitter sketch at a time
+HH_CAPACITY = 4 #heavy hitter candidates kept per requested word
+
+def _word_mask(corpus,words):
+    '''
+    Boolean mask over the vocabulary of a list of words, built once per corpus and word list.
+    '''
+    masks = corpus.setdefault('word_masks',{})
+    key = tuple(words)
+    if key not in masks or len(masks[key]) != len(corpus['vocab']):
+        mask = np.zeros(len(corpus['vocab']),dtype=bool)
+        mask[[corpus['word_ids'][word] for word in words if word in corpus['word_ids']]] = True
+        masks[key] = mask
+    return masks[key]
+
+def _heavy_hitters(tf_bin,params):
+    '''
+    Count-Min sketch and heavy hitter candidates of the words of a bin (sort_word_len with approx=True). Distinct
+    songs are added HH_BATCH at a time, weighted by their number of appearances, omitted words are left out.
+    '''
+    corpus = tf_bin['corpus']
+    vocab_counts, vocab_first = lyrics_corpus.song_word_counts(corpus)
+    hashes = lyrics_sketch.word_hashes(corpus)
+    omit = _word_mask(corpus,params['omit_words'] or [])
+    songs, appearances = np.unique(np.asarray(tf_bin['song_ids'],dtype=np.int64),return_counts=True)
+    
+    sketch = lyrics_sketch.cms_new()
+    candidates = np.zeros(0,dtype=np.int64)
+    for start in range(0,len(songs),HH_BATCH):
+        batch = songs[start:start+HH_BATCH]
+        sizes = corpus['vocab_offsets'][batch+1] - corpus['vocab_offsets'][batch]
+        ids = lyrics_corpus._gather(corpus['song_vocab'],corpus['vocab_offsets'],batch).astype(np.int64)
+        counts = lyrics_corpus._gather(vocab_counts,corpus['vocab_offsets'],batch)*np.repeat(appearances[start:start+HH_BATCH],sizes)
+        keep = ~omit[ids]
+        ids, inverse = np.unique(ids[keep],return_inverse=True)
+        candidates = lyrics_sketch.hh_update(sketch,candidates,ids,np.bincount(inverse,weights=counts[keep],minlength=len(ids)),
+                                             hashes,HH_CAPACITY*params['num_words'])
+    return sketch, candidates
+
+def _top_word_rows(tf_bin,shared,params):
+    corpus = tf_bin['corpus']
+    
+    if params['approx']: #bounded memory estimate, counts are upper bounds
+        sketch, candidates = _heavy_hitters(tf_bin,params)
+        hashes = lyrics_sketch.word_hashes(corpus)
+        if params['track_words'] != None:
+            rows = []
+            for word in params['track_words']:
+                word_id = corpus['word_ids'].get(word,-1)
+                rows.append((f'tracked_words: {word}', int(lyrics_sketch.cms_count(sketch,hashes[[word_id]])[0]) if word_id >= 0 else 0))
+            return rows
+        ids, counts = lyrics_sketch.hh_top(sketch,candidates,hashes,params['num_words'])
+        top = [(corpus['vocab'][word_id], count) for word_id, count in zip(ids.tolist(),counts.tolist())]
+        return [(f'{i+1}_most_repeated_words', top[i] if i < len(top) else None) for i in range(params['num_words'])]
+    
+    ids, counts, first = _shared(tf_bin,shared,'word_counts')
+    if params['track_words'] != None:
+        rows = []
+        for word in params['track_words']:
+            word_id = corpus['word_ids'].get(word,-1)
+            pos = np.searchsorted(ids,word_id)
+            found = pos < len(ids) and ids[pos] == word_id
+            rows.append((f'tracked_words: {word}', int(counts[pos]) if found else 0))
+        return rows
+    
+    if params['omit_words'] != None:
+        keep = ~_word_mask(corpus,params['omit_words'])[ids]
+        ids, counts, first = ids[keep], counts[keep], first[keep]
+    order = np.lexsort((first,-counts))[:params['num_words']] #ties keep first occurrence order like Counter.most_common
+    top = [(corpus['vocab'][ids[j]], int(counts[j])) for j in order]
+    return [(f'{i+1}_most_repeated_words', top[i] if i < len(top) else None) for i in range(params['num_words'])]
+
+def _top_song_rows(tf_bin,shared,params):
+    flattened = [', '.join(title) for title in tf_bin['titles_authors']]
+    top = Counter(flattened).most_common(params['num_songs'])
+    return [(f'{i+1}_most_repeated_songs', top[i] if i < len(top) else None) for i in range(params['num_songs'])]
+
+#metric name -> (function of (tf_bin, shared, params), row name or None when the function returns a list of (row, value))
+METRICS = {
+    'count_newlines': (lambda tf_bin,shared,params: _shared(tf_bin,shared,'lyrics').count('\n'), 'Num_Newlines'),
+    'count_brackets': (lambda tf_bin,shared,params: len(tf_bin['bracketed']), 'Num_Brackets'),
+    'count_parens': (lambda tf_bin,shared,params: len(tf_bin['parens']), 'Num_Parentheticals'),
+    'count_punctuation': (_punctuation_rows, None),
+    'avg_wrd_len': (_len_stat(0), 'Avg_Word_Len'),
+    'median_wrd_len': (_len_stat(1), 'Median_Word_Len'),
+    'num_unique_words': (lambda tf_bin,shared,params: len(_shared(tf_bin,shared,'unique_ids')), 'Num_unique_words'),
+    'approx_unique_words': (lambda tf_bin,shared,params: lyrics_sketch.hll_count(bin_sketch(tf_bin,params['precision'])), 'Approx_unique_words'),
+    'variance_words': (_len_stat(2), 'Variance_word_length'),
+    'sort_word_len': (_top_word_rows, None),
+    'num_song_repeats': (_top_song_rows, None),
+    'avg_title_len': (lambda tf_bin,shared,params: np.mean([len(auth_title[0]) for auth_title in tf_bin['titles_authors']]), 'Avg_title_length'),
+    'avg_artist_len': (lambda tf_bin,shared,params: np.mean([len(auth_title[1]) for auth_title in tf_bin['titles_authors']]), 'Avg_artist_name_length'),
+}
+
+def compute_metrics(metrics,binned=None,dataframe=None,raw_data=None,unique=True,num_words=10,num_songs=10,track_words=None,omit_words=["i", "and","she","he","that","this","a","they","you"],precision=12,approx=False,workers=None):
+    '''
+    Computes several metrics with a single pass over the bins. Intermediates such as the joined lyrics, the word ids,
+    the word counts, the unique words and the word length histogram are built once per bin and shared by every
+    requested metric, so asking for N metrics costs one pass instead of N.
+
+    3 input methods, same as the analytic functions
     1. only binned data, function will create the associated dataframe
     2. binned data and matching dataframe, function will append to dataframe
-    3. raw data as a list of [song_list, lyric_dict, timeframe='year'], same input to_timeframe function,
-        this function will call to_timeframe method on raw data and then return corresponding dataframe
+    3. raw data as a list of [song_list, lyric_dict, timeframe='year'], [entries, corpus, timeframe='year'] or
+       [dataset, timeframe='year'] with a Dataset
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        metrics - list of metric names, any of METRICS.keys() which are the names of the analytic functions,
+            e.g. ['count_newlines','avg_wrd_len','variance_words'], an element can also be a tuple (name, params)
+            to override the parameters below for that metric only, e.g. ('avg_wrd_len', {'unique': False})
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
-            song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
-            lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
-                str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
+        unique - bool, used by avg_wrd_len, median_wrd_len and variance_words
+        num_words, track_words, omit_words, approx - used by sort_word_len
+        num_songs - used by num_song_repeats
+        precision - used by approx_unique_words
+        workers - number of worker processes, None computes every bin in this process. The bins are split in
+            contiguous shards across a process pool that reads the corpus from shared memory (lyrics_parallel), only
+            the song ids of the bins are sent to the workers, which rebuild the bins with the same code as
+            bin_entries. The output is identical to workers=None whatever the number of workers. At most one
+            process per CPU is started and inputs too small to fill a few tasks (lyrics_parallel.MIN_TASK_SONGS song
+            appearances each) are computed in this process, so workers never makes a run much slower
+        
     Output:
-        dataframe - column headers are the binned keys(), rows are the feature each function calculates
+        dataframe - column headers are the binned keys(), rows are the rows each requested function would have added, in order
         
-    example usage for the 3 input methods:
-        count_newlines(binned = binned_data)
-        count_newlines(binned=binned_data,dataframe=exisiting_df)
-        count_newlines(raw_data=[songs,lyric_dict,'week'])
+    example:
+        compute_metrics(['count_newlines','avg_wrd_len','median_wrd_len','variance_words'],binned=binned_data)
+        compute_metrics(['avg_wrd_len',('variance_words',{'unique': False})],raw_data=[songs,lyric_dict,'year'])
+        compute_metrics(['sort_word_len','count_punctuation'],raw_data=[entries,corpus,'week'],workers=8)
     '''
-    assert isinstance(binned,(dict,type(None))) 
+    assert isinstance(binned,(dict,Iterator,type(None))) 
     assert isinstance(dataframe,(pd.DataFrame,type(None)))
     assert isinstance(raw_data,(list,type(None)))
+    assert workers is None or (isinstance(workers,int) and workers > 0)
+    requested = _requested_metrics(metrics,unique,num_words,num_songs,track_words,omit_words,precision,approx)
     
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
+    if result_cache is not None and not isinstance(binned,Iterator):
+        dataframe, bin_rows = _evaluate_cached(requested,binned,dataframe,raw_data,workers)
+    else:
+        dataframe, bin_rows = _evaluate(requested,binned,dataframe,raw_data,workers)
+    return _fill_rows(dataframe,[[pair for rows in metric_rows for pair in rows] for metric_rows in bin_rows])
 
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
+def _evaluate(requested,binned,dataframe,raw_data,workers):
+    '''
+    Computes the requested metrics of every column.
+    
+    Output:
+        dataframe - the dataframe to append to, created if needed
+        bin_rows - for every column of dataframe, for every requested metric, its list of (row name, value)
+    '''
+    if workers is not None and lyrics_parallel.usable_workers(workers) > 1:
+        return _evaluate_parallel(requested,binned,dataframe,raw_data,lyrics_parallel.usable_workers(workers))
+    
+    if binned == None: #No binned data given, create binned data by calling to_timeframe function
+        binned = _bin_raw_data(raw_data)
         dataframe = pd.DataFrame(columns=binned.keys())
     
+    if isinstance(binned,Iterator): #lazy bins, each one is released once its rows are computed
+        bin_rows = {tf: _bin_rows(tf_bin,requested) for tf, tf_bin in binned}
+        if type(dataframe) == type(None):
+            dataframe = pd.DataFrame(columns=list(bin_rows.keys()))
+        assert all([col in bin_rows for col in dataframe.columns]),'dataframe column headers need to match the binned timeframes'
+        return dataframe, [bin_rows[tf] for tf in dataframe.columns]
+    
     if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
         dataframe = pd.DataFrame(columns=binned.keys())
     
     assert all([isinstance(ele,dict) for ele in binned.values()])
     assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
     
-    data = [binned[tf]['lyrics'].count('\n') for tf in dataframe.columns] #list of calculated values
-    dataframe.loc['Num_Newlines'] = data #appends list with index name
+    #the single pass over the bins
+    return dataframe, [_bin_rows(binned[tf],requested) for tf in dataframe.columns]
+
+def _evaluate_cached(requested,binned,dataframe,raw_data,workers):
+    '''
+    _evaluate through result_cache, only the metrics that are not cached yet are computed, in a single pass.
+    '''
+    if binned == None:
+        assert isinstance(raw_data,list) and len(raw_data) in [2,3] #the rest is checked when the data is binned
+        dataframe = None #raw_data always gives a new dataframe, as in _evaluate, also once the cached bins are used
+        if isinstance(raw_data[0],Dataset): #the same key as the song_list and lyric_dict it holds
+            dataset, timeframe = raw_data[0].fingerprint(), raw_data[-1]
+        else:
+            dataset, timeframe = lyrics_cache.fingerprint(raw_data[0],raw_data[1]), raw_data[2] #content, so edits in place are seen
+    else:
+        if type(dataframe) == type(None):
+            dataframe = pd.DataFrame(columns=binned.keys())
+        assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
+        dataset, timeframe = lyrics_cache.binned_fingerprint(binned,dataframe.columns), None
+    
+    keys = [lyrics_cache.result_key(dataset,timeframe,name,params) for name, params in requested]
+    found = [result_cache.get(key) for key in keys] #{'columns': labels, 'rows': rows of every column} of every metric
+    missing = [i for i, value in enumerate(found) if value is None]
+    
+    if len(missing) > 0 or len(requested) == 0:
+        if binned == None and lyrics_parallel.usable_workers(workers) == 1: #bin once per dataset, shared by later calls
+            binned = result_cache.get_bins((dataset,timeframe))
+            if binned is None:
+                binned = _bin_raw_data(raw_data)
+                result_cache.set_bins((dataset,timeframe),binned)
+            raw_data = None
+        computed, bin_rows = _evaluate([requested[i] for i in missing],binned,dataframe,raw_data,workers)
+        for j, i in enumerate(missing):
+            found[i] = {'columns': list(computed.columns), 'rows': [metric_rows[j] for metric_rows in bin_rows]}
+            result_cache.set(keys[i],found[i])
+        dataframe = computed
+    elif binned == None:
+        dataframe = pd.DataFrame(columns=found[0]['columns'])
+    
+    return dataframe, [[value['rows'][c] for value in found] for c in range(len(dataframe.columns))]
+
+def iter_metrics(metrics,binned,unique=True,num_words=10,num_songs=10,track_words=None,omit_words=["i", "and","she","he","that","this","a","they","you"],precision=12,approx=False):
+    '''
+    Column by column version of compute_metrics, yields the column of every bin as soon as it is computed, so the
+    columns can be written out or plotted while the next bins are built. With iter_timeframe, only one bin is in
+    memory at a time.
+    
+    Input:
+        metrics - list of metric names or (name, params) tuples, see compute_metrics
+        binned - output of to_timeframe or iter_timeframe
+        unique, num_words, num_songs, track_words, omit_words, precision, approx - see compute_metrics
+    Output:
+        generator of (timeframe, pd.Series) pairs, the series index holds the same rows as compute_metrics
     
-    return dataframe
+    example:
+        for tf, column in iter_metrics(['avg_wrd_len','num_unique_words'],iter_timeframe(songs,lyric_dict,'week')):
+            column.to_frame(tf).T.to_csv('weekly.csv',mode='a',header=False)
+    '''
+    assert isinstance(binned,(dict,Iterator))
+    requested = _requested_metrics(metrics,unique,num_words,num_songs,track_words,omit_words,precision,approx)
+    
+    for tf, tf_bin in (binned.items() if isinstance(binned,dict) else binned):
+        rows = [pair for metric_rows in _bin_rows(tf_bin,requested) for pair in metric_rows]
+        yield tf, pd.Series([value for row_name, value in rows],index=[row_name for row_name, value in rows],dtype=object,name=tf)
+
+def _requested_metrics(metrics,unique,num_words,num_songs,track_words,omit_words,precision,approx):
+    '''
+    Validates the metrics and parameters of compute_metrics, returns the list of (name, params) to compute.
+    '''
+    assert isinstance(metrics,list)
+    assert isinstance(unique,bool)
+    assert isinstance(approx,bool)
+    assert isinstance(track_words,(list,type(None)))
+    if isinstance(track_words,list):
+        assert all([isinstance(word,str) and len(word)>0 for word in track_words])
+    assert isinstance(omit_words,(list,type(None)))
+    if isinstance(omit_words,list):
+        assert all([isinstance(word,str) and len(word)>0 for word in omit_words])
+    
+    defaults = {'unique': unique, 'num_words': num_words, 'num_songs': num_songs, 'track_words': track_words, 'omit_words': omit_words, 'precision': precision, 'approx': approx}
+    requested = []
+    for metric in metrics:
+        name, overrides = (metric, {}) if isinstance(metric,str) else metric
+        assert name in METRICS, f'unknown metric {name}, choose from {list(METRICS.keys())}'
+        assert all([param in defaults for param in overrides])
+        requested.append((name, {**defaults, **overrides}))
+    return requested
+
+def _bin_rows(tf_bin,requested):
+    '''
+    List of (row name, value) pairs of every requested metric for a single bin, intermediates are shared between the metrics.
+    '''
+    shared = {}
+    out = []
+    for name, params in requested:
+        function, row = METRICS[name]
+        values = function(tf_bin,shared,params)
+        out.append(values if row is None else [(row, values)])
+    return out
+
+def _shard_rows(corpus,task):
+    '''
+    Worker side of compute_metrics(workers=...), rebuilds every bin of a shard from its song ids and computes its rows.
+    '''
+    requested, shard = task
+    return [_bin_rows(_make_bin(corpus,ids),requested) for ids in shard]
+
+def _evaluate_parallel(requested,binned,dataframe,raw_data,workers):
+    '''
+    _evaluate over a process pool, the bins are sent as song ids and rebuilt by the workers.
+    '''
+    if binned == None: #only the group-by is done here, the bins themselves are built in the workers
+        entries, corpus, timeframe = _raw_entries(raw_data)
+        labels, bin_ids = _bin_song_ids(entries,timeframe)
+        ids_by_tf = dict(zip(labels,bin_ids))
+        dataframe = None
+    else:
+        corpus = None
+        ids_by_tf = {}
+        for tf, tf_bin in (binned.items() if isinstance(binned,dict) else binned): #only the song ids are kept
+            assert isinstance(tf_bin,dict)
+            assert corpus is None or tf_bin['corpus'] is corpus,'every bin needs to come from the same corpus'
+            corpus = tf_bin['corpus']
+            ids_by_tf[tf] = tf_bin['song_ids']
+    
+    if type(dataframe) == type(None):
+        dataframe = pd.DataFrame(columns=list(ids_by_tf.keys()))
+    assert all([col in ids_by_tf for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
+    bin_ids = [ids_by_tf[tf] for tf in dataframe.columns]
+    
+    if len(bin_ids) == 0:
+        return dataframe, []
+    #per-corpus arrays computed once here and shared, instead of once per worker
+    if any([name == 'approx_unique_words' or (name == 'sort_word_len' and params['approx']) for name, params in requested]):
+        lyrics_sketch.word_hashes(corpus)
+    if any([name == 'sort_word_len' for name, params in requested]):
+        lyrics_corpus.song_word_counts(corpus)
+    if any([name == 'count_punctuation' for name, params in requested]):
+        lyrics_corpus.punctuation_counts(corpus)
+    
+    #shards of about the same number of song appearances, results come back in shard order
+    shards = lyrics_parallel.split_tasks([len(ids) for ids in bin_ids],workers)
+    if len(shards) == 1: #not enough work to pay for the pool
+        return dataframe, _shard_rows(corpus,(requested,bin_ids))
+    tasks = [(requested, [bin_ids[i] for i in shard]) for shard in shards]
+    results = lyrics_parallel.map_corpus(_shard_rows,corpus,tasks,workers)
+    return dataframe, [bin_rows for shard_rows in results for bin_rows in shard_rows]
+
+def _is_number(value):
+    return isinstance(value,(int,float,np.integer,np.floating)) and not isinstance(value,(bool,np.bool_))
+
+def _row_block(rows,columns):
+    '''
+    Single dataframe of the rows {row name: values in column order}, built in one step. The columns are int64 when
+    every value is an integer, float64 when every value is a number (missing values are NaN), object otherwise
+    (e.g. the (word, count) tuples of sort_word_len).
+    '''
+    values = [value for data in rows.values() for value in data]
+    if all([value is None or _is_number(value) for value in values]):
+        if all([isinstance(value,(int,np.integer)) for value in values]):
+            matrix = np.array(list(rows.values()),dtype=np.int64).reshape(len(rows),len(columns))
+        else:
+            matrix = np.array([[np.nan if value is None else value for value in data] for data in rows.values()],dtype=np.float64).reshape(len(rows),len(columns))
+    else:
+        matrix = np.empty((len(rows),len(columns)),dtype=object)
+        for i, data in enumerate(rows.values()):
+            for j, value in enumerate(data): #element by element, tuples are kept as single values
+                matrix[i,j] = value
+    return pd.DataFrame(matrix,index=list(rows.keys()),columns=columns)
 
-def count_brackets(binned=None,dataframe=None,raw_data=None):
+def _fill_rows(dataframe,bin_rows):
+    '''
+    Adds the rows of every bin to dataframe, bin_rows[i] is the list of (row name, value) of column i. The new rows
+    are assembled into one typed block (_row_block) and concatenated once, rows already in dataframe are replaced.
+    '''
+    rows = {} #row name -> list of values in column order
+    for i, pairs in enumerate(bin_rows):
+        for row_name, value in pairs:
+            rows.setdefault(row_name,[None]*len(dataframe.columns))[i] = value
+    if len(rows) == 0:
+        return dataframe
+    
+    existing = [row_name for row_name in rows if row_name in dataframe.index]
+    for row_name in existing:
+        dataframe.loc[row_name] = rows.pop(row_name)
+    block = _row_block(rows,dataframe.columns)
+    if len(dataframe.index) == 0:
+        return block
+    return pd.concat([dataframe,block])
+
+def to_long(dataframe):
+    '''
+    Tidy long format of the output of the analytic functions, one row per (bin, metric row), with typed columns.
+    
+    Input:
+        dataframe - output of compute_metrics or of any analytic function
+    Output:
+        dataframe with the columns
+            'timeframe' - bin label (column of the input)
+            'metric' - row name of the input, e.g. 'Avg_Word_Len' or '3_most_repeated_words'
+            'item' - word or song of the rows holding (item, count) tuples, None otherwise
+            'value' - float64, the number or the count of the tuple, NaN if missing
+    
+    example:
+        to_long(compute_metrics(['avg_wrd_len','sort_word_len'],binned=binned_data)).pivot(index='timeframe',columns='metric',values='value')
+    '''
+    assert isinstance(dataframe,pd.DataFrame)
+    values = dataframe.to_numpy(dtype=object).ravel(order='F') #column after column, i.e. bin after bin
+    pairs = [value if isinstance(value,tuple) else (None,value) for value in values]
+    return pd.DataFrame({'timeframe': np.repeat(np.array(dataframe.columns,dtype=object),len(dataframe.index)),
+                         'metric': np.tile(np.array(dataframe.index,dtype=object),len(dataframe.columns)),
+                         'item': [item for item, value in pairs],
+                         'value': np.array([np.nan if value is None else value for item, value in pairs],dtype=np.float64)})
+
+def count_newlines(binned=None,dataframe=None,raw_data=None,workers=None):
+    '''
+    Counts the number of new line characters in the lyrics per time period.
+
+    3 input methods
+    1. only binned data, function will create the associated dataframe
+    2. binned data and matching dataframe, function will append to dataframe
+    3. raw data as a list of [song_list, lyric_dict, timeframe='year'], same input to_timeframe function,
+        this function will call to_timeframe method on raw data and then return corresponding dataframe
+    
+    Input:
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
+        dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
+            song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
+            lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
+                str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
+    Output:
+        dataframe - column headers are the binned keys(), rows are the feature each function calculates
+        
+    example usage for the 3 input methods:
+        count_newlines(binned = binned_data)
+        count_newlines(binned=binned_data,dataframe=exisiting_df)
+        count_newlines(raw_data=[songs,lyric_dict,'week'])
+    '''
+    return compute_metrics(['count_newlines'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
+
+def count_brackets(binned=None,dataframe=None,raw_data=None,workers=None):
     '''
     Counts the number of bracketed sections in the lyrics per time period.
 
@@ -150,12 +1161,14 @@ def count_brackets(binned=None,dataframe=None,raw_data=None):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
         
@@ -164,34 +1177,9 @@ def count_brackets(binned=None,dataframe=None,raw_data=None):
         count_brackets(binned=binned_data,dataframe=exisiting_df)
         count_brackets(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    data = [len(binned[tf]['bracketed']) for tf in binned.keys()] #list of calculated values
-    dataframe.loc['Num_Brackets'] = data #appends list with index name    
-    
-    return dataframe
+    return compute_metrics(['count_brackets'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
 
-def count_parens(binned=None,dataframe=None,raw_data=None):
+def count_parens(binned=None,dataframe=None,raw_data=None,workers=None):
     '''
     Counts the number of parentheticals in the lyrics per time period.
 
@@ -202,12 +1190,14 @@ def count_parens(binned=None,dataframe=None,raw_data=None):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
         
@@ -216,36 +1206,12 @@ def count_parens(binned=None,dataframe=None,raw_data=None):
         count_parens(binned=binned_data,dataframe=exisiting_df)
         count_parens(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    data = [len(binned[tf]['parens']) for tf in binned.keys()] #list of calculated values
-    dataframe.loc['Num_Parentheticals'] = data #appends list with index name    
-    
-    return dataframe
+    return compute_metrics(['count_parens'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
 
-def count_punctuation(binned=None,dataframe=None,raw_data=None):
+def count_punctuation(binned=None,dataframe=None,raw_data=None,workers=None,matrix=False):
     '''
     Counts the number of characters which are considered punctuation characters in the C locale in the lyrics per time period.
+    The counts of every song are computed once (lyrics_corpus.punctuation_counts) and summed per bin.
 
     3 input methods
     1. only binned data, function will create the associated dataframe
@@ -254,12 +1220,17 @@ def count_punctuation(binned=None,dataframe=None,raw_data=None):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
 
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
+        matrix - bool, True builds the 32 'Counted_' rows as one int64 block in a single step instead of appending
+            them row by row, the rows are then added to dataframe if given (replacing its 'Counted_' rows). workers is not used, summing the
+            per-song counts is already a single vectorized pass
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
 
@@ -267,45 +1238,22 @@ def count_punctuation(binned=None,dataframe=None,raw_data=None):
         count_punctuation(binned = binned_data)
         count_punctuation(binned=binned_data,dataframe=exisiting_df)
         count_punctuation(raw_data=[songs,lyric_dict,'week'])
+        count_punctuation(raw_data=[entries,corpus,'week'],matrix=True)
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
+    assert isinstance(matrix,bool)
+    if matrix:
+        assert isinstance(binned,(dict,Iterator,type(None)))
+        assert isinstance(dataframe,(pd.DataFrame,type(None)))
+        labels, counts = _punctuation_matrix(binned,raw_data)
+        row_names = [f'Counted_{punct}' for punct in string.punctuation]
+        if type(dataframe) == type(None):
+            return pd.DataFrame(counts.T,index=row_names,columns=labels)
+        assert all([col in labels for col in dataframe.columns]),'dataframe column headers need to match the binned timeframes'
+        position = {label: i for i, label in enumerate(labels)} #same path as the other rows, existing rows are replaced
+        return _fill_rows(dataframe,[list(zip(row_names,counts[position[tf]].tolist())) for tf in dataframe.columns])
+    return compute_metrics(['count_punctuation'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
 
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    data = {punct: [0]*len(dataframe.columns) for punct in string.punctuation}
-    #translator = str.maketrans('','',string.ascii_letters+string.digits)
-    
-    for i, tf in enumerate(dataframe.columns):
-        #for char in binned[tf]['lyrics'].translate(translator):
-        for char in binned[tf]['lyrics']:
-            if char in string.punctuation:
-                data[char][i]+=1
-
-    for punct in data.keys():
-        dataframe.loc[f'Counted_{punct}'] = data[punct] #appends list with index name
-    
-    return dataframe
-
-
-def avg_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True):
+def avg_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True,workers=None):
     '''
     Returns the average word length when considering all the lyrics per time period. Calculation can be done when including either unique or nonunique words.
 
@@ -316,12 +1264,14 @@ def avg_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
         unique - bool, determines if the average is calculated over unqiue words or not, default = true
         
     Output:
@@ -332,42 +1282,11 @@ def avg_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True):
         avg_wrd_len(binned=binned_data,dataframe=exisiting_df)
         avg_wrd_len(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
     assert isinstance(unique,bool)
     
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
+    return compute_metrics(['avg_wrd_len'],binned=binned,dataframe=dataframe,raw_data=raw_data,unique=unique,workers=workers)
 
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    avgs = []
-    for tf in dataframe.columns:
-        if unique == True:
-            word_len = [len(word) for word in set(binned[tf]['words'])]
-        else:
-            word_len = [len(word) for word in binned[tf]['words']]
-        avgs.append(np.mean(word_len))
-
-    dataframe.loc['Avg_Word_Len'] = avgs #appends list with index name
-        
-    return dataframe
-
-def median_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True):
+def median_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True,workers=None):
     '''
     Returns the median word length when considering all the lyrics per time period. Calculation can be done when including either unique or nonunique words.
 
@@ -378,12 +1297,14 @@ def median_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
             unique - bool, determines if the average is calculated over unqiue words or not, default = true
 
     Output:
@@ -394,42 +1315,9 @@ def median_wrd_len(binned=None,dataframe=None,raw_data=None,unique=True):
         median_wrd_len(binned=binned_data,dataframe=exisiting_df)
         median_wrd_len(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    
-    med = []
-    for tf in dataframe.columns:
-        if unique == True:
-            word_len = [len(word) for word in set(binned[tf]['words'])]
-        else:
-            word_len = [len(word) for word in binned[tf]['words']]
-        med.append(np.median(word_len))
+    return compute_metrics(['median_wrd_len'],binned=binned,dataframe=dataframe,raw_data=raw_data,unique=unique,workers=workers)
 
-    dataframe.loc['Median_Word_Len'] = med #appends list with index name
-        
-    return dataframe
-    
-def num_unique_words(binned=None,dataframe=None,raw_data=None):
+def num_unique_words(binned=None,dataframe=None,raw_data=None,workers=None):
     '''
     Returns the number of unique words when considering all the lyrics per time period.
 
@@ -440,12 +1328,14 @@ def num_unique_words(binned=None,dataframe=None,raw_data=None):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
         
@@ -454,37 +1344,43 @@ def num_unique_words(binned=None,dataframe=None,raw_data=None):
         num_unique_words(binned=binned_data,dataframe=exisiting_df)
         num_unique_words(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
+    return compute_metrics(['num_unique_words'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
 
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'    
-    
-    unique = []
-    for tf in dataframe.columns:
-        unique.append(len(set(binned[tf]['words'])))
+def approx_unique_words(binned=None,dataframe=None,raw_data=None,precision=12,workers=None):
+    '''
+    Returns an estimate of the number of unique words per time period from a HyperLogLog sketch of each bin.
+    Uses 2**precision bytes per bin whatever the size of the bin, the relative error is about 1.04/sqrt(2**precision).
+    Use bin_sketch() to keep the sketches themselves and merge them across bins or machines.
 
-    dataframe.loc['Num_unique_words'] = unique #appends list with index name
+    3 input methods
+    1. only binned data, function will create the associated dataframe
+    2. binned data and matching dataframe, function will append to dataframe
+    3. raw data as a list of [song_list, lyric_dict, timeframe='year'], same input to_timeframe function,
+        this function will call to_timeframe method on raw data and then return corresponding dataframe
+    
+    Input:
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
+        dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
+            song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
+            lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
+                str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
+        precision - int between 4 and 18, number of index bits of the sketch, default = 12
+    Output:
+        dataframe - column headers are the binned keys(), rows are the feature each function calculates
+        
+    example usage for the 3 input methods:
+        approx_unique_words(binned = binned_data)
+        approx_unique_words(binned=binned_data,dataframe=exisiting_df)
+        approx_unique_words(raw_data=[songs,lyric_dict,'week'])
+    '''
+    assert isinstance(precision,int)
     
-    return dataframe
+    return compute_metrics(['approx_unique_words'],binned=binned,dataframe=dataframe,raw_data=raw_data,precision=precision,workers=workers)
 
-def variance_words(binned=None,dataframe=None,raw_data=None,unique=True):
+def variance_words(binned=None,dataframe=None,raw_data=None,unique=True,workers=None):
     '''
     Returns the variance of the word length when considering all the lyrics per time period. Calculation can be done when including either unique or nonunique words.
 
@@ -495,12 +1391,14 @@ def variance_words(binned=None,dataframe=None,raw_data=None,unique=True):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
             unique - bool, determines if the average is calculated over unqiue words or not, default = true
     
     Output:
@@ -511,43 +1409,12 @@ def variance_words(binned=None,dataframe=None,raw_data=None,unique=True):
         variance_words(binned=binned_data,dataframe=exisiting_df)
         variance_words(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    var = []
-    for tf in dataframe.columns:
-        if unique == True:
-            word_len = [len(word) for word in set(binned[tf]['words'])]
-        else:
-            word_len = [len(word) for word in binned[tf]['words']]
-        var.append(np.var(word_len))
+    return compute_metrics(['variance_words'],binned=binned,dataframe=dataframe,raw_data=raw_data,unique=unique,workers=workers)
 
-    dataframe.loc['Variance_word_length'] = var #appends list with index name
-    
-    return dataframe
-    
-def sort_word_len(num_words=10,binned=None,dataframe=None,raw_data=None,track_words=None,omit_words=["i", "and","she","he","that","this","a","they","you"]):
+def sort_word_len(num_words=10,binned=None,dataframe=None,raw_data=None,track_words=None,omit_words=["i", "and","she","he","that","this","a","they","you"],approx=False,workers=None):
     '''
     Finds the top num_words words with the most occurrences in a time period. Specific words can be tracked or omitted when doing the search.
+    The word counts of every song are computed once (lyrics_corpus.song_word_counts) and merged per bin.
 
     3 input methods
     1. only binned data, function will create the associated dataframe
@@ -559,14 +1426,19 @@ def sort_word_len(num_words=10,binned=None,dataframe=None,raw_data=None,track_wo
 
     Input:
         num_words - top number of words returned and the number of times repeated
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
         track_words: list of strings, words to track, if value entered, overrides all other tracking metrics
         omit_words: list of strings, words to remove from top counted
+        approx: bool, True finds the top words with a Count-Min heavy hitter sketch (lyrics_sketch) of bounded memory
+            instead of exact counts, the counts are then upper bounds, off by at most 0.02% of the words of the bin
+            with high probability
         
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
@@ -576,9 +1448,6 @@ def sort_word_len(num_words=10,binned=None,dataframe=None,raw_data=None,track_wo
         function(binned=binned_data,dataframe=exisiting_df)
         function(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
     assert isinstance(track_words,(list,type(None)))
     if isinstance(track_words,list):
         assert all([isinstance(word,str) and len(word)>0 for word in track_words])
@@ -586,43 +1455,9 @@ def sort_word_len(num_words=10,binned=None,dataframe=None,raw_data=None,track_wo
     if isinstance(omit_words,list):
         assert all([isinstance(word,str) and len(word)>0 for word in omit_words])
     
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
+    return compute_metrics(['sort_word_len'],binned=binned,dataframe=dataframe,raw_data=raw_data,num_words=num_words,track_words=track_words,omit_words=omit_words,approx=approx,workers=workers)
 
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    counted = []
-    for tf in dataframe.columns:
-        counted.append(Counter(binned[tf]['words']))
-
-    if track_words != None:
-        for word in track_words:
-            dataframe.loc[f'tracked_words: {word}'] = [counted_dict[word] for counted_dict in counted]
-    
-    else:
-        if omit_words != None:
-            for word in omit_words:
-                for counted_dict in counted:
-                    del counted_dict[word]
-        for i in range(num_words):
-            dataframe.loc[f'{i+1}_most_repeated_words'] = [item.most_common(num_words)[i] for item in counted] #appends list with index name
-        
-    return dataframe
-
-def num_song_repeats(num_songs=10,binned=None,dataframe=None,raw_data=None):
+def num_song_repeats(num_songs=10,binned=None,dataframe=None,raw_data=None,workers=None):
     '''
     Finds the top num_songs most repeated songs of the time period.
 
@@ -635,12 +1470,14 @@ def num_song_repeats(num_songs=10,binned=None,dataframe=None,raw_data=None):
     For each input method above you have the option to indicate the number of songs to include in the return
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
         
@@ -649,39 +1486,9 @@ def num_song_repeats(num_songs=10,binned=None,dataframe=None,raw_data=None):
         function(binned=binned_data,dataframe=exisiting_df)
         function(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    counted = []
-    for tf in dataframe.columns:
-        flattened = [', '.join(title) for title in binned[tf]['titles_authors']]
-        counted.append(Counter(flattened).most_common(num_songs))
-        
-    for i in range(num_songs):
-        dataframe.loc[f'{i+1}_most_repeated_songs'] = [item[i] for item in counted] #appends list with index name
-        
-    return dataframe
+    return compute_metrics(['num_song_repeats'],binned=binned,dataframe=dataframe,raw_data=raw_data,num_songs=num_songs,workers=workers)
 
-def avg_title_len(binned=None,dataframe=None,raw_data=None):
+def avg_title_len(binned=None,dataframe=None,raw_data=None,workers=None):
     '''
     Calculates the average length of all the song titles in a time period.
 
@@ -692,12 +1499,14 @@ def avg_title_len(binned=None,dataframe=None,raw_data=None):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
         
@@ -706,38 +1515,9 @@ def avg_title_len(binned=None,dataframe=None,raw_data=None):
         avg_title_len(binned=binned_data,dataframe=exisiting_df)
         avg_title_len(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
+    return compute_metrics(['avg_title_len'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
 
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-
-    lens = []
-    for tf in dataframe.columns:
-        titles = [len(auth_title[0]) for auth_title in binned[tf]['titles_authors']]
-        lens.append(np.mean(titles))
-        
-    dataframe.loc['Avg_title_length'] = lens #appends list with index name
-        
-    return dataframe
-
-def avg_artist_len(binned=None,dataframe=None,raw_data=None):
+def avg_artist_len(binned=None,dataframe=None,raw_data=None,workers=None):
     '''
     Calculates the average artist name length for all the songs in a time period.
     
@@ -748,12 +1528,14 @@ def avg_artist_len(binned=None,dataframe=None,raw_data=None):
         this function will call to_timeframe method on raw data and then return corresponding dataframe
     
     Input:
-        binned - output of to_timeframe function, dictionary of dictionaries
+        binned - output of to_timeframe function, dictionary of dictionaries, or the lazy iterator of iter_timeframe
         dataframe - exisiting dataframe with column headers matching binned data, data will be appended to
-        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year']
+        raw_data - expects a list of 3 elements, [song_list, lyric_dict, timeframe='year'], or [dataset, timeframe] with a Dataset
             song_list - is import from Jordan's function, is a list of dictionaries, each dictionary is a week
             lyric_dict - output of lyrics_to_dict, keys are tuples of ('song title', 'author'), 4 values
                 str: 'title, author', str: 'lyric data', list: each element is a parenthetical, list: each element containts bracket content
+            or [entries, corpus, timeframe='year'] from lyrics_corpus, which only re-runs the group-by
+        workers - number of worker processes sharing the bins, None for a single process, see compute_metrics
     Output:
         dataframe - column headers are the binned keys(), rows are the feature each function calculates
         
@@ -762,34 +1544,4 @@ def avg_artist_len(binned=None,dataframe=None,raw_data=None):
         avg_artist_len(binned=binned_data,dataframe=exisiting_df)
         avg_artist_len(raw_data=[songs,lyric_dict,'week'])
     '''
-    assert isinstance(binned,(dict,type(None))) 
-    assert isinstance(dataframe,(pd.DataFrame,type(None)))
-    assert isinstance(raw_data,(list,type(None)))
-    
-    if binned == None: #No binned data given, create binned data by calling to_timeframe function
-        assert isinstance(raw_data,list)
-        assert (len(raw_data)==3)
-        assert isinstance(raw_data[0],list)
-        assert all([isinstance(week,dict) for week in raw_data[0]])
-        assert isinstance(raw_data[1],dict)
-        assert all([isinstance(song,list) and isinstance(info,tuple) for song,info in zip(raw_data[1].values(),raw_data[1].keys())])
-        assert any([raw_data[2] == period for period in ['week','month','year']])
-
-        binned = to_timeframe(raw_data[0],raw_data[1],timeframe=raw_data[2])
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    if type(dataframe) == type(None): #If no dataframe given, create new one based off of binned keys
-        dataframe = pd.DataFrame(columns=binned.keys())
-    
-    assert all([isinstance(ele,dict) for ele in binned.values()])
-    assert all([col in binned.keys() for col in dataframe.columns]),'dataframe column headers need to match binned.keys()'
-    
-    
-    lens = []
-    for tf in dataframe.columns:
-        names = [len(auth_title[1]) for auth_title in binned[tf]['titles_authors']]
-        lens.append(np.mean(names))
-        
-    dataframe.loc['Avg_artist_name_length'] = lens #appends list with index name
-        
-    return dataframe
\ No newline at end of file
+    return compute_metrics(['avg_artist_len'],binned=binned,dataframe=dataframe,raw_data=raw_data,workers=workers)
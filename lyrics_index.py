@@ -0,0 +1,188 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+import lyrics_corpus
+
+'''
+Inverted index of the corpus, word -> posting list of (song id, count), for word trend queries that only read the
+postings of the asked words instead of recounting every word of every bin.
+Workflow follows as:
+    corpus -> build_index() -> save_index() / load_index() -> term_trends(words, index, corpus, entries, 'week')
+    new songs -> lyrics_corpus.extend_corpus() -> update_index()
+
+The postings of all words are stored back to back, word w owns songs[offsets[w]:offsets[w+1]] and the same slice of
+counts, sorted by song id. An index on disk is a directory of .npy files and a meta.json, opened with numpy.memmap.
+'''
+
+FORMAT = 'lyrics-index'
+FORMAT_VERSION = 1
+ARRAYS = ['songs','counts','offsets']
+
+def _postings(corpus,song_ids):
+    '''
+    Postings of a range of consecutive songs, as (word offsets, songs, counts) sorted by word then song.
+    '''
+    vocab_counts, vocab_first = lyrics_corpus.song_word_counts(corpus)
+    start, end = corpus['vocab_offsets'][song_ids[0]], corpus['vocab_offsets'][song_ids[-1]+1]
+    words = np.asarray(corpus['song_vocab'][start:end])
+    sizes = corpus['vocab_offsets'][song_ids+1] - corpus['vocab_offsets'][song_ids]
+    order = np.argsort(words,kind='stable') #song_vocab is grouped by song, a stable sort keeps the songs in order
+    offsets = np.zeros(len(corpus['vocab'])+1,dtype=np.int64)
+    np.cumsum(np.bincount(words,minlength=len(corpus['vocab'])),out=offsets[1:])
+    songs = np.repeat(song_ids,sizes)[order].astype(np.int32)
+    return offsets, songs, np.asarray(vocab_counts[start:end])[order].astype(np.int32)
+
+def build_index(corpus):
+    '''
+    Builds the inverted index of every song of a corpus from the per-song word counts (lyrics_corpus.song_word_counts).
+
+    Input:
+        corpus - output of lyrics_corpus.tokenize_lyrics (or lyrics_store.load_corpus)
+    Output:
+        index - dictionary with the arrays 'songs' (np.int32 song ids), 'counts' (np.int32 occurrences of the word in
+            the song) and 'offsets' (np.int64, one more than the number of words), plus 'num_songs', the number of
+            songs indexed
+    '''
+    assert isinstance(corpus,dict)
+    num_songs = len(corpus['keys'])
+    if num_songs == 0:
+        return {'songs': np.zeros(0,dtype=np.int32), 'counts': np.zeros(0,dtype=np.int32),
+                'offsets': np.zeros(len(corpus['vocab'])+1,dtype=np.int64), 'num_songs': 0}
+    offsets, songs, counts = _postings(corpus,np.arange(num_songs,dtype=np.int64))
+    return {'songs': songs, 'counts': counts, 'offsets': offsets, 'num_songs': num_songs}
+
+def update_index(index,corpus):
+    '''
+    Adds the songs appended to the corpus since the index was built (lyrics_corpus.extend_corpus), only the new songs
+    are read. New songs have the highest ids, so their postings go at the end of every word's list.
+
+    Input:
+        index - output of build_index, update_index or load_index
+        corpus - the same corpus, extended with new songs
+    Output:
+        index - new index dictionary covering every song of the corpus
+    '''
+    assert isinstance(index,dict)
+    num_songs = len(corpus['keys'])
+    assert num_songs >= index['num_songs'],'the corpus has fewer songs than the index, build a new index'
+    if num_songs == index['num_songs'] and len(index['offsets']) == len(corpus['vocab'])+1:
+        return index
+    num_words = len(corpus['vocab'])
+    old_offsets = np.concatenate([index['offsets'],np.full(num_words+1-len(index['offsets']),index['offsets'][-1])])
+    if num_songs == index['num_songs']:
+        return {'songs': index['songs'], 'counts': index['counts'], 'offsets': old_offsets, 'num_songs': num_songs}
+    new_offsets, new_songs, new_counts = _postings(corpus,np.arange(index['num_songs'],num_songs,dtype=np.int64))
+
+    #every posting moves right by the number of new postings of the words before it (and, for new ones, of its word)
+    offsets = old_offsets + new_offsets
+    old_sizes = np.diff(old_offsets)
+    old_position = np.arange(old_offsets[-1],dtype=np.int64) + np.repeat(new_offsets[:-1],old_sizes)
+    new_position = np.arange(new_offsets[-1],dtype=np.int64) + np.repeat(old_offsets[1:],np.diff(new_offsets))
+    songs = np.zeros(offsets[-1],dtype=np.int32)
+    counts = np.zeros(offsets[-1],dtype=np.int32)
+    songs[old_position], counts[old_position] = index['songs'], index['counts']
+    songs[new_position], counts[new_position] = new_songs, new_counts
+    return {'songs': songs, 'counts': counts, 'offsets': offsets, 'num_songs': num_songs}
+
+def postings(index,word_id):
+    '''
+    Posting list of one word, views into the index arrays (no copy).
+
+    Output:
+        songs - np.int32 song ids using the word, sorted
+        counts - np.int32 occurrences of the word in each of them
+    '''
+    start, end = index['offsets'][word_id], index['offsets'][word_id+1]
+    return index['songs'][start:end], index['counts'][start:end]
+
+def _song_entries(entries,num_songs):
+    '''
+    Chart entry rows of every song, grouped by song: song i appears in rows[offsets[i]:offsets[i+1]].
+    '''
+    song_ids = entries['song_id'].values
+    valid = np.flatnonzero(song_ids >= 0)
+    rows = valid[np.argsort(song_ids[valid],kind='stable')]
+    offsets = np.zeros(num_songs+1,dtype=np.int64)
+    np.cumsum(np.bincount(song_ids[valid],minlength=num_songs),out=offsets[1:])
+    return rows, offsets
+
+def term_trends(words,index,corpus,entries,timeframe='year',normalize=False):
+    '''
+    Occurrences of a few words per time bin, read from the postings of those words joined with the chart
+    appearances of their songs. Same values as sort_word_len(track_words=words) on to_timeframe bins, in time
+    proportional to the postings touched and their chart appearances.
+
+    Input:
+        words - list of strings
+        index - output of build_index or load_index for the corpus
+        corpus - output of lyrics_corpus.tokenize_lyrics
+        entries - output of lyrics_corpus.load_chart_entries (or lyrics_store.load_entries)
+        timeframe - indiates over which timeperiod to count, ['week','month','year', 'decade']
+        normalize - bool, True divides the counts by the number of words of the bin
+    Output:
+        dataframe - column headers are the bin labels (same as to_timeframe keys), rows are 'tracked_words: {word}',
+            int64 counts, or float64 frequencies with normalize=True
+
+    example:
+        index = build_index(corpus)
+        term_trends(['love','baby'],index,corpus,entries,'week').T.plot()
+    '''
+    assert isinstance(words,list) and all([isinstance(word,str) and len(word)>0 for word in words])
+    assert isinstance(index,dict)
+    assert isinstance(entries,pd.DataFrame)
+    assert index['num_songs'] == len(corpus['keys']),'the index does not cover every song of the corpus, use update_index'
+
+    codes, labels = lyrics_corpus.bin_codes(entries,timeframe)
+    rows, offsets = _song_entries(entries,index['num_songs'])
+    counts = np.zeros((len(words),len(labels)),dtype=np.int64)
+    for i, word in enumerate(words):
+        word_id = corpus['word_ids'].get(word,-1)
+        if word_id < 0 or word_id+1 >= len(index['offsets']):
+            continue
+        songs, song_counts = postings(index,word_id)
+        appearances = offsets[np.asarray(songs,dtype=np.int64)+1] - offsets[np.asarray(songs,dtype=np.int64)]
+        word_rows = lyrics_corpus._gather(rows,offsets,songs)
+        counts[i] = np.bincount(codes[word_rows],weights=np.repeat(np.asarray(song_counts,dtype=np.int64),appearances),
+                                minlength=len(labels)).astype(np.int64)
+
+    dataframe = pd.DataFrame(counts,index=[f'tracked_words: {word}' for word in words],columns=labels)
+    if normalize:
+        song_ids = entries['song_id'].values
+        valid = song_ids >= 0
+        num_words = corpus['offsets'][song_ids[valid]+1] - corpus['offsets'][song_ids[valid]]
+        totals = np.bincount(codes[valid],weights=num_words,minlength=len(labels))
+        with np.errstate(invalid='ignore',divide='ignore'):
+            dataframe = dataframe / totals
+    return dataframe
+
+def save_index(index,path='Index'):
+    '''
+    Writes an index to a directory of .npy files plus a meta.json written last, like lyrics_store.save_corpus.
+    '''
+    assert isinstance(index,dict)
+    os.makedirs(path,exist_ok=True)
+    if os.path.exists(os.path.join(path,'meta.json')):
+        os.remove(os.path.join(path,'meta.json'))
+    for name in ARRAYS:
+        np.save(os.path.join(path,name+'.npy'),np.asarray(index[name]))
+    meta = {'format': FORMAT, 'version': FORMAT_VERSION, 'num_songs': int(index['num_songs']),
+            'num_words': len(index['offsets'])-1, 'num_postings': int(index['offsets'][-1])}
+    with open(os.path.join(path,'meta.json'),'w') as f:
+        json.dump(meta,f,indent=1)
+
+def load_index(path='Index',mmap=True):
+    '''
+    Opens an index saved with save_index, the arrays are memory maps unless mmap=False. Bring it up to date with
+    update_index if songs were added to the corpus since.
+    '''
+    meta_fname = os.path.join(path,'meta.json')
+    assert os.path.exists(meta_fname),f'{path} is not an index (no meta.json), build it with build_index() and save_index()'
+    with open(meta_fname) as f:
+        meta = json.load(f)
+    assert meta.get('format') == FORMAT,f'{path} is not an index'
+    assert meta.get('version') == FORMAT_VERSION,f"{path} has format version {meta.get('version')}, this code reads version {FORMAT_VERSION}, rebuild it"
+    index = {name: np.load(os.path.join(path,name+'.npy'),mmap_mode='r' if mmap else None) for name in ARRAYS}
+    index['num_songs'] = meta['num_songs']
+    return index
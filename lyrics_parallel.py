@@ -0,0 +1,131 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import lyrics_store
+
+'''
+Process pool execution over a corpus, used by the workers= mode of lyrics_functions.compute_metrics.
+
+The numeric arrays of the corpus and the lyrics text (one utf-8 buffer plus byte offsets) are copied once into
+shared memory blocks that every worker maps without a copy, only the small per-song lists (keys, parens, bracketed)
+and the vocabulary are pickled, once per worker. A corpus opened with lyrics_store.load_corpus is not copied at
+all, the workers open the same store and share its pages. Tasks then only carry song ids, and results come back in
+task order so the output does not depend on the number of workers or on scheduling.
+
+    results = map_corpus(function, corpus, tasks, workers=8)   # == [function(corpus, task) for task in tasks]
+'''
+
+SHARED_ARRAYS = ['tokens','offsets','song_vocab','vocab_offsets','word_len','num_unique','song_artist','word_hash','punct_counts','vocab_counts','vocab_first']
+PICKLED_LISTS = ['keys','parens','bracketed','vocab','artists']
+MIN_TASK_SONGS = 2000 #song appearances of a task, smaller tasks cost more to send and collect than they save
+
+def usable_workers(workers):
+    '''
+    Number of processes worth starting for workers, at most the CPUs this process can run on since more processes
+    than CPUs only take turns on them. 1 means the work is done in this process.
+    '''
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os,'sched_getaffinity') else (os.cpu_count() or 1)
+    return max(1,min(workers or 1,cpus))
+
+def split_tasks(sizes,workers):
+    '''
+    Splits items, e.g. bins, into contiguous shards of about the same work: a few shards per worker so uneven items
+    still balance, but no fewer than MIN_TASK_SONGS song appearances per shard, so a small input gives a single shard.
+
+    Input:
+        sizes - number of song appearances of every item, an item also counts 1 for its fixed cost
+        workers - number of worker processes
+    Output:
+        shards - list of np.int64 arrays of item positions, in order
+    '''
+    work = np.cumsum(np.asarray(sizes,dtype=np.int64)+1)
+    if len(work) == 0:
+        return []
+    num_shards = max(1,min(workers*4,int(work[-1])//MIN_TASK_SONGS,len(work)))
+    bounds = np.searchsorted(work,np.arange(1,num_shards)*work[-1]/num_shards)
+    return [shard for shard in np.split(np.arange(len(work)),bounds) if len(shard) > 0]
+
+def share_corpus(corpus):
+    '''
+    Copies the arrays and lyrics of a corpus into shared memory, or only refers to its store if it was opened with
+    lyrics_store.load_corpus.
+
+    Input:
+        corpus - output of lyrics_corpus.tokenize_lyrics
+    Output:
+        handle - picklable description of the corpus, rebuilt in another process with attach_corpus
+        blocks - list of SharedMemory blocks, close and unlink them with release once no process needs them
+    '''
+    if corpus.get('store') is not None: #the workers open the store, only arrays computed since are shared
+        arrays = {name: corpus[name] for name in SHARED_ARRAYS if name in corpus and not isinstance(corpus[name],np.memmap)}
+        handle = {'arrays': {}, 'store': corpus['store']}
+    else:
+        arrays = {name: corpus[name] for name in SHARED_ARRAYS if name in corpus}
+        arrays['lyrics_utf8'], arrays['lyrics_utf8_offsets'] = lyrics_store.encode_strings(corpus['lyrics'])
+        handle = {'arrays': {}, 'lists': {name: corpus[name] for name in PICKLED_LISTS}}
+    blocks = []
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True,size=max(array.nbytes,1)) #empty blocks are not allowed
+        blocks.append(block)
+        np.ndarray(array.shape,dtype=array.dtype,buffer=block.buf)[:] = array
+        handle['arrays'][name] = (block.name, array.shape, array.dtype.str)
+    return handle, blocks
+
+def attach_corpus(handle):
+    '''
+    Rebuilds a corpus from the handle of share_corpus, the arrays are views of the shared memory (no copy).
+
+    Output:
+        corpus - same keys as the shared corpus, 'lyrics' is a lyrics_store.StringTable
+        blocks - the attached SharedMemory blocks, keep a reference as long as the corpus is used
+    '''
+    corpus = lyrics_store.load_corpus(handle['store']) if 'store' in handle else dict(handle['lists'])
+    blocks = []
+    for name, (block_name, shape, dtype) in handle['arrays'].items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        corpus[name] = np.ndarray(shape,dtype=np.dtype(dtype),buffer=block.buf)
+    if 'store' not in handle:
+        corpus['lyrics'] = lyrics_store.StringTable(corpus.pop('lyrics_utf8'),corpus.pop('lyrics_utf8_offsets'))
+        corpus['word_ids'] = {word: i for i, word in enumerate(corpus['vocab'])}
+        corpus['song_ids'] = {key: i for i, key in enumerate(corpus['keys'])}
+    return corpus, blocks
+
+def release(blocks):
+    '''
+    Closes and removes the shared memory blocks created by share_corpus.
+    '''
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+_worker = {} #corpus attached by each worker process
+
+def _init_worker(handle):
+    _worker['corpus'], _worker['blocks'] = attach_corpus(handle)
+
+def _run_task(args):
+    function, task = args
+    return function(_worker['corpus'],task)
+
+def map_corpus(function,corpus,tasks,workers):
+    '''
+    Runs function(corpus, task) for every task on a pool of worker processes sharing the corpus.
+
+    Input:
+        function - module level function of (corpus, task), so it can be sent to the workers
+        corpus - output of lyrics_corpus.tokenize_lyrics
+        tasks - list of picklable tasks, e.g. arrays of song ids
+        workers - number of worker processes
+    Output:
+        list of results in the order of tasks
+    '''
+    assert isinstance(workers,int) and workers > 0
+    handle, blocks = share_corpus(corpus)
+    try:
+        with ProcessPoolExecutor(max_workers=workers,initializer=_init_worker,initargs=(handle,)) as pool:
+            return list(pool.map(_run_task,[(function,task) for task in tasks]))
+    finally:
+        release(blocks)
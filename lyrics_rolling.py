@@ -0,0 +1,197 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+import lyrics_corpus
+import lyrics_functions
+
+'''
+Rolling metrics over the weekly charts, e.g. the 52 week moving average word length, the number of distinct words
+of the last 52 weeks or their most repeated words. Every column is a window of consecutive chart weeks moved one
+week at a time, without re-binning: each step adds the week entering the window to running totals and removes the
+week leaving it, so a step costs about one week of data and the whole history runs in linear time.
+Workflow follows as:
+    entries, corpus (lyrics_corpus or lyrics_functions.Dataset) -> rolling_metrics(entries,corpus,window=52)
+
+    additive features (lyrics_corpus.song_features) - prefix sums over the weeks, a window is the difference of two
+    distinct words - for every word, the number of (week, song) pairs of the window using it, the word is in the
+        window's vocabulary while that number is above 0
+    most repeated words and songs - running counts, plus a few candidates that hold the top (_RollingTop)
+'''
+
+class _RollingTop:
+    '''
+    Exact top ids of counts that go up and down, by count then id. The candidates hold every id that can be in the
+    top and every other id has a count of at most bound, so a step only looks at the ids it changed and at the
+    candidates. All counts are scanned again only when the bound does not separate the top from the rest anymore, or
+    the candidates grew too many.
+    :param size: number of ids
+    :param num: size of the top
+    :param skip: optional boolean array, ids that are never reported
+    '''
+    def __init__(self,size,num,skip=None):
+        self.counts = np.zeros(size,dtype=np.int64)
+        self.num = num
+        self.skip = np.zeros(size,dtype=bool) if skip is None else skip
+        self.is_candidate = np.zeros(size,dtype=bool)
+        self.candidates = np.zeros(0,dtype=np.int64)
+        self.bound = 0
+
+    def update(self,ids,counts):
+        '''
+        Adds counts (negative to remove) to ids, repeats allowed.
+        '''
+        np.add.at(self.counts,ids,counts)
+        grew = ids[counts > 0]
+        entering = grew[(self.counts[grew] > self.bound) & ~self.is_candidate[grew] & ~self.skip[grew]]
+        if len(entering) > 0:
+            entering = np.unique(entering)
+            self.is_candidate[entering] = True
+            self.candidates = np.concatenate([self.candidates,entering])
+
+    def _scan(self):
+        '''
+        Candidates from all counts: every id with at least the count of the 2*num-th id, bound is the largest count below.
+        '''
+        counts = np.where(self.skip,0,self.counts)
+        positive = np.flatnonzero(counts > 0)
+        if len(positive) > 2*self.num:
+            threshold = -np.partition(-counts[positive],2*self.num-1)[2*self.num-1]
+            candidates = positive[counts[positive] >= threshold]
+            rest = counts[positive][counts[positive] < threshold]
+            self.bound = int(rest.max()) if len(rest) else 0
+        else:
+            candidates, self.bound = positive, 0
+        self.is_candidate[self.candidates] = False
+        self.is_candidate[candidates] = True
+        self.candidates = candidates
+
+    def top(self):
+        '''
+        :return: (ids, counts) of the top, fewer than num when fewer ids have a positive count
+        '''
+        if self.num == 0:
+            return self.candidates[:0], self.counts[:0]
+        if len(self.candidates) > max(64,8*self.num):
+            self._scan()
+        for attempt in range(2):
+            counts = self.counts[self.candidates]
+            order = np.lexsort((self.candidates,-counts))[:self.num]
+            ids, counts = self.candidates[order], counts[order]
+            ids, counts = ids[counts > 0], counts[counts > 0]
+            if (len(ids) == self.num and counts[-1] > self.bound) or (len(ids) < self.num and self.bound == 0):
+                return ids, counts
+            self._scan()
+        return ids, counts
+
+def _weekly(entries):
+    '''
+    Week labels in chart order and the matched song ids of every week.
+    '''
+    labels, groups = lyrics_corpus.group_entries(entries,'week')
+    song_ids = entries['song_id'].values
+    week_ids = [song_ids[rows] for rows in groups]
+    return labels, [ids[ids >= 0] for ids in week_ids]
+
+def _week_words(corpus,ids):
+    '''
+    Word ids of the distinct songs of a week and their occurrences weighted by the appearances of the song, a word
+    used by several songs is repeated (lyrics_corpus.word_counts without merging the repeats).
+    '''
+    vocab_counts = lyrics_corpus.song_word_counts(corpus)[0]
+    songs, appearances = np.unique(ids,return_counts=True)
+    sizes = corpus['vocab_offsets'][songs+1] - corpus['vocab_offsets'][songs]
+    word_ids = lyrics_corpus._gather(corpus['song_vocab'],corpus['vocab_offsets'],songs).astype(np.int64)
+    counts = lyrics_corpus._gather(vocab_counts,corpus['vocab_offsets'],songs).astype(np.int64)*np.repeat(appearances,sizes)
+    return word_ids, counts, songs, appearances
+
+def rolling_metrics(entries,corpus,window=52,min_weeks=None,features=None,unique_words=True,num_words=10,num_songs=10,omit_words=["i", "and","she","he","that","this","a","they","you"]):
+    '''
+    Metrics of every window of window consecutive chart weeks, moved one week at a time.
+
+    Input:
+        entries - output of lyrics_corpus.load_chart_entries (or Dataset.entries)
+        corpus - output of lyrics_corpus.tokenize_lyrics, the same one used to build entries (or Dataset.corpus)
+        window - number of chart weeks of a window
+        min_weeks - windows with fewer weeks (the first ones) are left out, window if None, 1 to start at the first week
+        features - optional output of lyrics_corpus.song_features(corpus), computed here if not given
+        unique_words - bool, adds the 'Num_unique_words' row, same as num_unique_words on the window
+        num_words, omit_words - the '{i}_most_repeated_words' rows, as in sort_word_len, 0 to leave them out
+        num_songs - the '{i}_most_repeated_songs' rows, as in num_song_repeats, 0 to leave them out
+    Output:
+        dataframe - column headers are the last week of every window, rows are the rows of aggregate_features
+            (the window's sums), then 'Num_unique_words' and the most repeated words and songs as (item, count) tuples,
+            ties by word id (order of first appearance in the corpus) and song id
+
+    example:
+        dataset = lyrics_functions.Dataset(songs,lyric_dict)
+        yearly = rolling_metrics(dataset.entries,dataset.corpus,window=52)
+        yearly.loc['Avg_Word_Len'].plot()
+    '''
+    assert isinstance(entries,pd.DataFrame)
+    assert isinstance(corpus,dict)
+    assert isinstance(window,int) and window > 0
+    min_weeks = window if min_weeks is None else min_weeks
+    assert isinstance(min_weeks,int) and 0 < min_weeks <= window
+    assert isinstance(features,(pd.DataFrame,type(None)))
+    assert isinstance(omit_words,(list,type(None)))
+    if isinstance(omit_words,list):
+        assert all([isinstance(word,str) and len(word)>0 for word in omit_words])
+
+    labels, week_ids = _weekly(entries)
+    num_weeks = len(labels)
+    columns = list(range(min_weeks-1,num_weeks))
+
+    #additive features: a window is the difference of two prefix sums over the weeks
+    features = lyrics_corpus.song_features(corpus) if features is None else features
+    values = features[lyrics_functions.FEATURE_COLUMNS].values.astype(np.int64)
+    prefix = np.zeros((num_weeks+1,1+len(lyrics_functions.FEATURE_COLUMNS)),dtype=np.int64)
+    for t, ids in enumerate(week_ids):
+        prefix[t+1,0] = len(ids)
+        prefix[t+1,1:] = values[ids].sum(axis=0)
+    np.cumsum(prefix,axis=0,out=prefix)
+    ends = np.array(columns,dtype=np.int64)+1
+    sums = (prefix[ends] - prefix[np.maximum(ends-window,0)]).astype(float)
+    feature_rows = lyrics_functions._feature_rows(sums[:,0],{column: sums[:,j+1] for j, column in enumerate(lyrics_functions.FEATURE_COLUMNS)})
+
+    #running counts, updated with the week entering the window and the one leaving it
+    num_vocab = len(corpus['vocab'])
+    songs_using = np.zeros(num_vocab,dtype=np.int64)
+    distinct = 0
+    skip = np.zeros(num_vocab,dtype=bool)
+    skip[[corpus['word_ids'][word] for word in (omit_words or []) if word in corpus['word_ids']]] = True
+    words = _RollingTop(num_vocab,num_words,skip)
+    songs = _RollingTop(len(corpus['keys']),num_songs)
+    in_window = deque()
+
+    bin_rows = []
+    for t, ids in enumerate(week_ids):
+        in_window.append(_week_words(corpus,ids))
+        leaving = [in_window.popleft()] if len(in_window) > window else []
+        for sign, (word_ids, word_counts, song_ids, song_counts) in [(1,in_window[-1])] + [(-1,week) for week in leaving]:
+            if unique_words: #a word enters the vocabulary when its first song enters the window, and leaves with its last
+                before = songs_using[word_ids] > 0
+                np.add.at(songs_using,word_ids,sign)
+                changed = word_ids[before != (songs_using[word_ids] > 0)]
+                if len(changed) > 0:
+                    distinct += sign*len(np.unique(changed))
+            if num_words > 0:
+                words.update(word_ids,sign*word_counts)
+            if num_songs > 0:
+                songs.update(song_ids,sign*song_counts)
+        if t < min_weeks-1:
+            continue
+
+        c = t-(min_weeks-1)
+        rows = [(row_name, row_values[c]) for row_name, row_values in feature_rows.items()]
+        if unique_words:
+            rows.append(('Num_unique_words', distinct))
+        if num_words > 0:
+            top = [(corpus['vocab'][word_id], count) for word_id, count in zip(*[part.tolist() for part in words.top()])]
+            rows.extend([(f'{i+1}_most_repeated_words', top[i] if i < len(top) else None) for i in range(num_words)])
+        if num_songs > 0:
+            top = [(', '.join(corpus['keys'][song_id]), count) for song_id, count in zip(*[part.tolist() for part in songs.top()])]
+            rows.extend([(f'{i+1}_most_repeated_songs', top[i] if i < len(top) else None) for i in range(num_songs)])
+        bin_rows.append(rows)
+
+    return lyrics_functions._fill_rows(pd.DataFrame(columns=[labels[t] for t in columns]),bin_rows)
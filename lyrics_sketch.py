@@ -0,0 +1,207 @@
+import hashlib
+import numpy as np
+
+'''
+Bounded memory sketches for the per-bin statistics of lyrics_functions.py.
+
+Sketches are plain numpy arrays so they can be pickled, saved with np.save, or sent between processes and machines,
+and two sketches of the same precision always merge into the sketch of the union of their inputs.
+
+HyperLogLog (distinct counts):
+    registers = hll_new(precision)
+    hll_add(registers, hashes)
+    hll_count(hll_merge([registers_1960s, registers_1970s]))
+
+Count-Min (frequencies, never underestimated) and heavy hitters (most frequent words):
+    sketch = cms_new(width_bits, depth)
+    cms_add(sketch, hashes, counts)
+    cms_count(cms_merge([sketch_1960s, sketch_1970s]), hashes)
+    candidates = hh_update(sketch, candidates, word_ids, counts, word_hashes(corpus), capacity)
+    word_ids, counts = hh_top(sketch, candidates, word_hashes(corpus), 10)
+'''
+
+CMS_MULTIPLIERS = np.array([0x9E3779B97F4A7C15,0xC2B2AE3D27D4EB4F,0x165667B19E3779F9,0xD6E8FEB86659FD93,
+                            0xFF51AFD7ED558CCD,0xC4CEB9FE1A85EC53,0x94D049BB133111EB,0xBF58476D1CE4E5B9],dtype=np.uint64)
+
+def word_hashes(corpus):
+    '''
+    64-bit hash of every vocab word of the corpus. Hashes are computed from the word text, not the word id, so
+    sketches built from different corpora (e.g. on different machines) can still be merged. Cached in corpus['word_hash'].
+
+    Input:
+        corpus - output of lyrics_corpus.tokenize_lyrics
+    Output:
+        np.uint64 array, hash of every word id
+    '''
+    known = corpus.get('word_hash',np.zeros(0,dtype=np.uint64))
+    if len(known) != len(corpus['vocab']): #missing, or the vocabulary grew since (new words get the next ids)
+        new = np.array([int.from_bytes(hashlib.blake2b(word.encode('utf-8'),digest_size=8).digest(),'little')
+                        for word in corpus['vocab'][len(known):]],dtype=np.uint64)
+        corpus['word_hash'] = np.concatenate([known,new])
+    return corpus['word_hash']
+
+def _bit_length(values):
+    '''
+    Vectorized int.bit_length() of a np.uint64 array.
+    '''
+    values = values.copy()
+    length = np.zeros(values.shape,dtype=np.int64)
+    for shift in (32,16,8,4,2,1):
+        big = values >= (np.uint64(1) << np.uint64(shift))
+        length[big] += shift
+        values[big] >>= np.uint64(shift)
+    return length + (values > 0)
+
+def hll_new(precision=12):
+    '''
+    Empty HyperLogLog sketch with 2**precision one byte registers (4 KB at the default precision, ~1.6% error).
+    '''
+    assert isinstance(precision,int) and 4 <= precision <= 18
+    return np.zeros(2**precision,dtype=np.uint8)
+
+def hll_add(registers,hashes):
+    '''
+    Adds 64-bit hashes (e.g. word_hashes(corpus)[word_ids]) to a HyperLogLog sketch in place.
+
+    Input:
+        registers - output of hll_new
+        hashes - np.uint64 array, duplicates are fine
+    Output:
+        registers, for chaining
+    '''
+    index, rank = hll_positions(hashes,int(np.log2(len(registers))))
+    np.maximum.at(registers,index,rank)
+    return registers
+
+def hll_positions(hashes,precision=12):
+    '''
+    Register and rank of every hash in a HyperLogLog sketch of that precision, the work of hll_add before the
+    registers are updated. Keep them for hashes that are added over and over, see word_registers.
+
+    Output:
+        index - np.int64 array, register of every hash
+        rank - np.uint8 array, value every hash proposes for its register
+    '''
+    hashes = np.asarray(hashes,dtype=np.uint64)
+    index = (hashes >> np.uint64(64-precision)).astype(np.int64) #top bits pick the register
+    rest = hashes & np.uint64((1 << (64-precision)) - 1)
+    rank = (64-precision) - _bit_length(rest) + 1 #position of the first 1 bit in the remaining bits
+    return index, rank.astype(np.uint8)
+
+def word_registers(corpus,precision=12):
+    '''
+    hll_positions of every vocab word of the corpus, so adding words to a sketch is a single np.maximum.at over
+    their ids: np.maximum.at(registers,index[word_ids],rank[word_ids]). Cached in corpus['word_registers'] per
+    precision, words added to the vocabulary since are computed on the next call.
+    '''
+    cached = corpus.setdefault('word_registers',{})
+    index, rank = cached.get(precision,(np.zeros(0,dtype=np.int64),np.zeros(0,dtype=np.uint8)))
+    hashes = word_hashes(corpus)
+    if len(index) != len(hashes):
+        new_index, new_rank = hll_positions(hashes[len(index):],precision)
+        cached[precision] = (np.concatenate([index,new_index]),np.concatenate([rank,new_rank]))
+    return cached[precision]
+
+def hll_merge(sketches):
+    '''
+    Merges a list of HyperLogLog sketches of the same precision into the sketch of the union of their inputs.
+    '''
+    assert len(sketches) > 0
+    assert all([len(sketch) == len(sketches[0]) for sketch in sketches]),'sketches need the same precision to be merged'
+    return np.maximum.reduce([np.asarray(sketch,dtype=np.uint8) for sketch in sketches])
+
+def hll_count(registers):
+    '''
+    Estimated number of distinct hashes added to a HyperLogLog sketch.
+    '''
+    m = len(registers)
+    alpha = 0.7213/(1 + 1.079/m)
+    estimate = alpha*m*m/np.sum(np.power(2.0,-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5*m and zeros > 0: #small range correction, linear counting
+        estimate = m*np.log(m/zeros)
+    return float(estimate)
+
+def _cms_columns(sketch,hashes):
+    '''
+    Column of every hash in every row of a Count-Min sketch, multiply-shift hashing with one odd multiplier per row.
+    '''
+    depth, width = sketch.shape
+    bits = np.uint64(64-int(np.log2(width)))
+    with np.errstate(over='ignore'): #products wrap around modulo 2**64
+        return ((np.asarray(hashes,dtype=np.uint64)[None,:]*CMS_MULTIPLIERS[:depth,None]) >> bits).astype(np.int64)
+
+def cms_new(width_bits=14,depth=4):
+    '''
+    Empty Count-Min sketch of depth rows of 2**width_bits int64 counters (512 KB at the default size). A count is
+    overestimated by at most e/2**width_bits of the total count added, with probability 1 - exp(-depth).
+    '''
+    assert isinstance(width_bits,int) and 4 <= width_bits <= 24
+    assert isinstance(depth,int) and 1 <= depth <= len(CMS_MULTIPLIERS)
+    return np.zeros((depth,2**width_bits),dtype=np.int64)
+
+def cms_add(sketch,hashes,counts):
+    '''
+    Adds counts[i] occurrences of hashes[i] to a Count-Min sketch in place.
+
+    Input:
+        sketch - output of cms_new
+        hashes - np.uint64 array (e.g. word_hashes(corpus)[word_ids]), duplicates are fine
+        counts - int array of the same length
+    Output:
+        sketch, for chaining
+    '''
+    columns = _cms_columns(sketch,hashes)
+    counts = np.asarray(counts,dtype=np.int64)
+    for row in range(len(sketch)):
+        sketch[row] += np.bincount(columns[row],weights=counts,minlength=sketch.shape[1]).astype(np.int64)
+    return sketch
+
+def cms_count(sketch,hashes):
+    '''
+    Estimated count of every hash, never below the true count.
+    '''
+    columns = _cms_columns(sketch,hashes)
+    return np.take_along_axis(sketch,columns,axis=1).min(axis=0)
+
+def cms_merge(sketches):
+    '''
+    Merges a list of Count-Min sketches of the same shape into the sketch of the sum of their inputs.
+    '''
+    assert len(sketches) > 0
+    assert all([sketch.shape == sketches[0].shape for sketch in sketches]),'sketches need the same shape to be merged'
+    return np.sum(sketches,axis=0)
+
+def hh_update(sketch,candidates,ids,counts,hashes,capacity):
+    '''
+    Adds a batch of items to a Count-Min sketch and keeps the capacity items with the highest estimated counts as
+    heavy hitter candidates. Memory stays bounded by the sketch and the candidates whatever the number of distinct
+    items added.
+
+    Input:
+        sketch - output of cms_new, updated in place
+        candidates - sorted np.int64 array of the current candidate ids (empty to start)
+        ids - np.int64 array of the distinct item ids of the batch (e.g. word ids)
+        counts - int array, occurrences of every item of the batch
+        hashes - np.uint64 hash of every possible id, e.g. word_hashes(corpus)
+        capacity - number of candidates to keep
+    Output:
+        sorted np.int64 array of the new candidate ids
+    '''
+    cms_add(sketch,hashes[ids],counts)
+    candidates = np.union1d(candidates,ids).astype(np.int64)
+    if len(candidates) > capacity:
+        estimates = cms_count(sketch,hashes[candidates])
+        candidates = np.sort(candidates[np.argsort(-estimates,kind='stable')[:capacity]])
+    return candidates
+
+def hh_top(sketch,candidates,hashes,num):
+    '''
+    The num candidates with the highest estimated counts, ties by id.
+
+    Output:
+        ids - np.int64 array, counts - np.int64 array of their estimated counts, highest first
+    '''
+    estimates = cms_count(sketch,hashes[candidates])
+    order = np.argsort(-estimates,kind='stable')[:num]
+    return candidates[order], estimates[order]
@@ -0,0 +1,254 @@
+import json
+import os
+import pickle
+import sys
+import numpy as np
+import pandas as pd
+
+import lyrics_corpus
+
+'''
+Versioned binary on-disk format for the corpus and the chart, replacing the Songs and Lyrics_Dict pickles.
+Workflow follows as:
+    Songs + Lyrics_Dict -> convert_pickles() -> Corpus/ -> load_corpus() / load_entries() -> lyrics_functions.py
+
+A store is a directory of .npy files and a meta.json describing them. Every array, and every string table (one utf-8
+buffer plus int64 byte offsets), is opened with numpy.memmap: nothing is read until it is used, pages are shared
+between every process that opens the same store, and a metric only touches the columns it needs.
+
+    Corpus/
+        meta.json                               format version, counts and list of files
+        tokens, offsets, song_vocab, vocab_offsets, word_len, num_unique, song_artist [, word_hash]
+        vocab, titles, artists, lyrics          string tables, <name>_utf8.npy and <name>_utf8_offsets.npy
+        parens, bracketed                       string tables plus <name>_groups.npy, song i owns strings groups[i]:groups[i+1]
+        chart_week, chart_rank, chart_song_id, chart_artist_id      one row per chart entry (lyrics_corpus.load_chart_entries)
+        chart_song, chart_titles, chart_artists, weeks, week_sizes  to rebuild Songs exactly, with load_song_list
+'''
+
+FORMAT = 'lyrics-corpus'
+FORMAT_VERSION = 2
+
+ARRAYS = ['tokens','offsets','song_vocab','vocab_offsets','word_len','num_unique','song_artist']
+OPTIONAL_ARRAYS = ['word_hash']
+
+class StringTable:
+    '''
+    Read-only list of strings stored as one utf-8 buffer and byte offsets, string i is decoded when accessed.
+    '''
+    def __init__(self,data,offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self,i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i+1]]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+class StringLists:
+    '''
+    Read-only list of lists of strings (e.g. the parentheticals of every song), list i is strings[groups[i]:groups[i+1]].
+    '''
+    def __init__(self,strings,groups):
+        self.strings = strings
+        self.groups = groups
+
+    def __len__(self):
+        return len(self.groups) - 1
+
+    def __getitem__(self,i):
+        return [self.strings[j] for j in range(self.groups[i],self.groups[i+1])]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def encode_strings(strings):
+    '''
+    utf-8 buffer (np.uint8) and np.int64 byte offsets of a list of strings, the layout read by StringTable.
+    '''
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = np.zeros(len(encoded)+1,dtype=np.int64)
+    np.cumsum([len(text) for text in encoded],out=offsets[1:])
+    return np.frombuffer(b''.join(encoded),dtype=np.uint8), offsets
+
+def _groups(lists):
+    return np.concatenate([[0],np.cumsum([len(strings) for strings in lists],dtype=np.int64)]).astype(np.int64)
+
+def _chart_columns(song_list,corpus):
+    '''
+    Chart entries table, chart song of every entry (-1 for the placeholder row of an empty week), distinct chart
+    songs, and date and number of entries of every week of song_list.
+    '''
+    entries = lyrics_corpus.load_chart_entries(song_list,corpus)
+    chart_songs = {}
+    chart_song = []
+    week_sizes = []
+    for week in song_list: #same order as load_chart_entries
+        songs = [song for song in week.values() if isinstance(song,list)]
+        chart_song.extend([chart_songs.setdefault(tuple(song),len(chart_songs)) for song in songs] or [-1])
+        week_sizes.append(max(len(songs),1))
+    return entries, np.array(chart_song,dtype=np.int32), list(chart_songs.keys()), np.array(week_sizes,dtype=np.int32)
+
+def save_corpus(corpus,song_list=None,path='Corpus'):
+    '''
+    Writes a corpus, and optionally the chart it comes with, to a store directory.
+
+    Input:
+        corpus - output of lyrics_corpus.tokenize_lyrics (or of load_corpus)
+        song_list - optional list of weekly dictionaries from billboard_scraping.py, the Songs pickle
+        path - store directory, created if missing, files of an older store are overwritten
+    '''
+    assert isinstance(corpus,dict)
+    assert isinstance(song_list,(list,type(None)))
+    assert all([len(key) == 2 for key in corpus['keys']]),'corpus keys need to be (title, artist) tuples'
+    os.makedirs(path,exist_ok=True)
+    if os.path.exists(os.path.join(path,'meta.json')): #the old store is invalid until the new meta.json is written
+        os.remove(os.path.join(path,'meta.json'))
+
+    arrays = {name: np.asarray(corpus[name]) for name in ARRAYS}
+    for name in OPTIONAL_ARRAYS:
+        if len(corpus.get(name,())) == len(corpus['vocab']) and len(corpus['vocab']) > 0:
+            arrays[name] = np.asarray(corpus[name])
+
+    tables = {'vocab': corpus['vocab'], 'titles': [key[0] for key in corpus['keys']], 'artists': corpus['artists'],
+              'lyrics': corpus['lyrics']}
+    for name in ['parens','bracketed']:
+        tables[name] = [text for strings in corpus[name] for text in strings]
+        arrays[name+'_groups'] = _groups(corpus[name])
+
+    meta = {'format': FORMAT, 'version': FORMAT_VERSION, 'num_songs': len(corpus['keys']),
+            'num_words': len(corpus['vocab']), 'num_tokens': int(len(corpus['tokens'])), 'num_entries': None}
+    if song_list is not None:
+        entries, chart_song, chart_keys, week_sizes = _chart_columns(song_list,corpus)
+        arrays['chart_week'] = entries['week'].values
+        arrays['chart_rank'] = entries['rank'].values
+        arrays['chart_song_id'] = entries['song_id'].values
+        arrays['chart_artist_id'] = entries['artist_id'].values
+        arrays['chart_song'] = chart_song
+        arrays['week_sizes'] = week_sizes
+        tables['weeks'] = [week['Week'] for week in song_list]
+        tables['chart_titles'] = [key[0] for key in chart_keys]
+        tables['chart_artists'] = [key[1] for key in chart_keys]
+        meta['num_entries'] = len(entries)
+
+    for name, strings in tables.items():
+        arrays[name+'_utf8'], arrays[name+'_utf8_offsets'] = encode_strings(strings)
+    for name, array in arrays.items():
+        np.save(os.path.join(path,name+'.npy'),array)
+
+    meta['files'] = sorted(arrays.keys())
+    with open(os.path.join(path,'meta.json'),'w') as f: #written last, a store without it is incomplete
+        json.dump(meta,f,indent=1)
+
+def _open(path,mmap=True):
+    '''
+    meta.json of a store and a function loading one of its arrays by name.
+    '''
+    meta_fname = os.path.join(path,'meta.json')
+    assert os.path.exists(meta_fname),f'{path} is not a corpus store (no meta.json), build it with convert_pickles()'
+    with open(meta_fname) as f:
+        meta = json.load(f)
+    assert meta.get('format') == FORMAT,f'{path} is not a corpus store'
+    assert meta.get('version') == FORMAT_VERSION,f"{path} has format version {meta.get('version')}, this code reads version {FORMAT_VERSION}, rebuild it with convert_pickles()"
+
+    def array(name):
+        return np.load(os.path.join(path,name+'.npy'),mmap_mode='r' if mmap else None)
+    return meta, array
+
+def _table(array,name):
+    return StringTable(array(name+'_utf8'),array(name+'_utf8_offsets'))
+
+def load_corpus(path='Corpus',mmap=True):
+    '''
+    Opens the corpus of a store. The arrays are memory maps and the lyrics, parentheticals and brackets are decoded
+    only when a song is accessed, so opening is quick whatever the size of the corpus. Only the vocabulary and the
+    song keys are read up front, to build the word_ids and song_ids dictionaries.
+
+    Input:
+        path - store directory written by save_corpus or convert_pickles
+        mmap - bool, False reads every array into memory instead of mapping it
+    Output:
+        corpus - same keys as lyrics_corpus.tokenize_lyrics, plus 'store' which is the store path
+    '''
+    meta, array = _open(path,mmap)
+
+    corpus = {name: array(name) for name in ARRAYS}
+    for name in OPTIONAL_ARRAYS:
+        if name in meta['files']:
+            corpus[name] = array(name)
+
+    corpus['vocab'] = list(_table(array,'vocab'))
+    corpus['word_ids'] = {word: i for i, word in enumerate(corpus['vocab'])}
+    corpus['artists'] = list(_table(array,'artists'))
+    artists = corpus['artists']
+    corpus['keys'] = [(title, artists[artist_id]) for title, artist_id in zip(_table(array,'titles'),corpus['song_artist'].tolist())]
+    corpus['song_ids'] = {key: i for i, key in enumerate(corpus['keys'])}
+    corpus['lyrics'] = _table(array,'lyrics')
+    corpus['parens'] = StringLists(_table(array,'parens'),array('parens_groups'))
+    corpus['bracketed'] = StringLists(_table(array,'bracketed'),array('bracketed_groups'))
+    corpus['store'] = path
+    return corpus
+
+def load_entries(path='Corpus'):
+    '''
+    Loads the chart entries table of a store, same as lyrics_corpus.load_chart_entries(song_list, corpus) on the
+    pickles it was converted from, without building the list of weekly dictionaries.
+    '''
+    meta, array = _open(path)
+    assert meta['num_entries'] is not None,f'{path} was saved without a chart, pass song_list to save_corpus'
+    return pd.DataFrame({'week': np.asarray(array('chart_week')),
+                         'rank': np.asarray(array('chart_rank')),
+                         'song_id': np.asarray(array('chart_song_id')),
+                         'artist_id': np.asarray(array('chart_artist_id'))})
+
+def load_song_list(path='Corpus'):
+    '''
+    Rebuilds the list of weekly dictionaries of the Songs pickle from a store, for code that still expects it.
+    '''
+    meta, array = _open(path)
+    assert meta['num_entries'] is not None,f'{path} was saved without a chart, pass song_list to save_corpus'
+    titles = list(_table(array,'chart_titles'))
+    artists = list(_table(array,'chart_artists'))
+    ranks = array('chart_rank').tolist()
+    chart_song = array('chart_song').tolist()
+
+    song_list = []
+    row = 0
+    for date, size in zip(_table(array,'weeks'),array('week_sizes').tolist()): #entries are stored week after week
+        week = {'Week': date}
+        for i in range(row,row+size):
+            if chart_song[i] < 0: #placeholder row of an empty week
+                continue
+            week[ranks[i]] = [titles[chart_song[i]], artists[chart_song[i]]]
+        row += size
+        song_list.append(week)
+    return song_list
+
+def convert_pickles(songs_fname='Songs',lyrics_fname='Lyrics_Dict',path='Corpus'):
+    '''
+    Converts the Songs and Lyrics_Dict pickles into a store, run once after scraping.
+
+    Input:
+        songs_fname - pickle written by billboard_scraping.py
+        lyrics_fname - pickle written by lyrics_scrp.py, either lyric_dict or the (lyric_dict, non_lyrics) tuple of lyrics_to_dict
+        path - store directory
+    Output:
+        corpus - the corpus that was written, as returned by load_corpus
+    '''
+    with open(songs_fname,'rb') as f:
+        song_list = pickle.load(f)
+    with open(lyrics_fname,'rb') as f:
+        lyric_dict = pickle.load(f)
+    if isinstance(lyric_dict,tuple): #output of lyrics_to_dict saved as is
+        lyric_dict = lyric_dict[0]
+
+    save_corpus(lyrics_corpus.tokenize_lyrics(lyric_dict),song_list,path)
+    return load_corpus(path)
+
+if __name__ == "__main__":
+    convert_pickles(*sys.argv[1:4])